@@ -0,0 +1,117 @@
+"""
+Middlewares for app project.
+"""
+import functools
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetrics:
+    """Database queries and timings of a single request."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_started_at = None
+        self.render_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper that counts the queries and their time."""
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started_at
+
+    def time_serialization(self, to_representation):
+        """
+        Wrap a serializer `to_representation` to add its time to the serialization time.
+
+        Querysets are often only evaluated while they are serialized, so the time of the queries made meanwhile
+        is left out, as it is already counted in the database time.
+        """
+        @functools.wraps(to_representation)
+        def wrapper(*args, **kwargs):
+            started_at, db_time = time.perf_counter(), self.db_time
+            try:
+                return to_representation(*args, **kwargs)
+            finally:
+                self.serialize_time += time.perf_counter() - started_at - (self.db_time - db_time)
+
+        return wrapper
+
+    def start_render(self):
+        self.render_started_at = time.perf_counter()
+
+    def finish_render(self, response):
+        self.render_time = time.perf_counter() - self.render_started_at
+
+
+def time_serializer(request, serializer):
+    """
+    Time the serialization of the data of a serializer in the metrics of the request.
+
+    Serializers build their `data` inside the view, so this time is counted neither in the database time nor
+    in the render time. With `many=True`, only the list serializer is timed, so each item is counted once.
+    Requests that did not go through `RequestTimingMiddleware` have no metrics, and are left as they are.
+    """
+    metrics = getattr(request, 'metrics', None)
+    if metrics is not None:
+        serializer.to_representation = metrics.time_serialization(serializer.to_representation)
+
+    return serializer
+
+
+class RequestTimingMiddleware:
+    """
+    Measure the number of database queries, their total time, the time spent serializing the response data
+    (see `time_serializer`), the time spent rendering the response body and the total time of each request.
+
+    The measures are sent in the `Server-Timing` header, and requests above `REQUEST_TIMING_SLOW_MS` or
+    `REQUEST_TIMING_MAX_QUERIES` are logged as warnings. Queries made while a streaming response is sent
+    happen after the headers, so they are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.metrics = metrics = RequestMetrics()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics.record_query))
+            response = self.get_response(request)
+
+        total_time = time.perf_counter() - metrics.started_at
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f'serialize;dur={metrics.serialize_time * 1000:.2f}',
+            f'render;dur={metrics.render_time * 1000:.2f}',
+            f'total;dur={total_time * 1000:.2f}',
+        ])
+
+        is_slow = total_time * 1000 >= settings.REQUEST_TIMING_SLOW_MS
+        if is_slow or metrics.queries > settings.REQUEST_TIMING_MAX_QUERIES:
+            logger.warning(
+                'Slow request %s %s: %d queries, db %.2fms, serialize %.2fms, render %.2fms, total %.2fms',
+                request.method, request.get_full_path(), metrics.queries, metrics.db_time * 1000,
+                metrics.serialize_time * 1000, metrics.render_time * 1000, total_time * 1000,
+            )
+
+        return response
+
+    def process_template_response(self, request, response):
+        """Time the rendering of DRF responses, which happens right after this hook."""
+        request.metrics.start_render()
+        response.add_post_render_callback(request.metrics.finish_render)
+        return response
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,6 +56,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'app.urls'
 
+# Requests slower than this many milliseconds, or with more than this many database queries, are logged
+# by RequestTimingMiddleware
+
+REQUEST_TIMING_SLOW_MS = 500
+
+REQUEST_TIMING_MAX_QUERIES = 20
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -88,6 +96,25 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Shared by every process (the API and the process_imports worker) through Redis when REDIS_URL is set,
+# or kept in the memory of each process otherwise
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -129,6 +156,59 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Transactions bulk creation
+# Batches with at least this many rows are inserted with COPY instead of bulk_create
+
+TRANSACTIONS_COPY_THRESHOLD = 5000
+
+# Smaller batches are inserted with bulk_create, one statement per chunk of this many rows, all of them
+# in a single database transaction, or each chunk in its own transaction when atomic is False
+
+TRANSACTIONS_BULK_CREATE_BATCH_SIZE = 1000
+
+TRANSACTIONS_BULK_CREATE_ATOMIC = True
+
+# Either bulk_create (orm), or psycopg2's execute_values, which inserts the validated values without
+# instantiating models
+
+TRANSACTIONS_BULK_CREATE_BACKEND = 'orm'
+
+# Streamed payloads (application/x-ndjson) are validated and inserted in chunks of this many rows
+
+TRANSACTIONS_STREAM_CHUNK_SIZE = 5000
+
+# Transactions list page size, and the maximum page size accepted in the page_size query param
+
+TRANSACTIONS_PAGE_SIZE = 100
+
+TRANSACTIONS_MAX_PAGE_SIZE = 1000
+
+# The transactions export is read from the database and streamed in chunks of this many rows
+
+TRANSACTIONS_EXPORT_CHUNK_SIZE = 2000
+
+# A running import job whose worker has not renewed its lease for this many seconds (because it crashed
+# or lost its database connection) is claimed again by another worker, up to this many attempts in total
+
+TRANSACTIONS_IMPORT_LEASE_SECONDS = 300
+
+TRANSACTIONS_IMPORT_MAX_ATTEMPTS = 3
+
+# The summaries are cached on this cache for this many seconds, or until the transactions of the user change
+
+TRANSACTIONS_CACHE_ALIAS = 'default'
+
+TRANSACTIONS_CACHE_TIMEOUT = 300
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'transactions.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'transactions.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
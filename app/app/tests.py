@@ -0,0 +1,63 @@
+"""
+Test for the app middlewares.
+"""
+
+import re
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from transactions.models import Transaction
+from transactions.serializers import TransactionSerializer
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    """Test the request timing headers and logs."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_server_timing_header_has_the_queries_and_timings(self):
+        """Tests that every database query of the request is counted"""
+        Transaction.objects.create(
+            user_email='janedoe@email.com', reference='000001', date='2020-01-03',
+            amount=-5113, type='outflow', category='groceries'
+        )
+
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        res = self.client.get(url)
+
+        server_timing = [metric.split(';')[0] for metric in res['Server-Timing'].split(', ')]
+        self.assertEqual(server_timing, ['db', 'serialize', 'render', 'total'])
+        self.assertIn('desc="2 queries"', res['Server-Timing'])
+
+    def test_server_timing_header_has_the_serialization_time(self):
+        """Tests that the serializers data, built inside the view, is timed apart from the queries"""
+        Transaction.objects.create(
+            user_email='janedoe@email.com', reference='000001', date='2020-01-03',
+            amount=-5113, type='outflow', category='groceries'
+        )
+        to_representation = TransactionSerializer.to_representation
+
+        def slow_to_representation(serializer, instance):
+            time.sleep(0.05)
+            return to_representation(serializer, instance)
+
+        with mock.patch.object(TransactionSerializer, 'to_representation', slow_to_representation):
+            res = self.client.get(reverse('transaction:transaction-list'))
+
+        serialize_time = float(re.search(r'serialize;dur=([0-9.]+)', res['Server-Timing']).group(1))
+        self.assertGreaterEqual(serialize_time, 50)
+
+    @override_settings(REQUEST_TIMING_MAX_QUERIES=0)
+    def test_requests_above_the_queries_threshold_are_logged(self):
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+
+        with self.assertLogs('app.middleware', level='WARNING') as logs:
+            self.client.get(url)
+
+        self.assertIn('2 queries', logs.output[0])
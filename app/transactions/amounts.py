@@ -0,0 +1,46 @@
+"""
+Parsing of transaction amounts into integer cents.
+"""
+import decimal
+
+INVALID_FORMAT_MESSAGE = 'Invalid amount format.'
+TOO_MANY_DECIMALS_MESSAGE = 'Amount should have at most two decimal places.'
+
+
+def parse_amount(value: str) -> int:
+    """
+    Convert an amount string (example: '-51.13') into an int with its exact value in cents.
+
+    Amounts with exactly two decimal places, the format of almost every transaction, are converted by
+    dropping the decimal point and parsing the digits as an int. Any other amount goes through `decimal.Decimal`.
+
+    Raises
+    ------
+    ValueError
+        If the amount is not a valid decimal, or has more than two decimal places.
+    """
+    whole, _, fraction = value.partition('.')
+
+    if len(fraction) == 2 and fraction.isdigit():
+        try:
+            return int(whole + fraction)
+        except ValueError:
+            pass
+
+    return parse_decimal_amount(value)
+
+
+def parse_decimal_amount(value: str) -> int:
+    """Convert an amount string into an int with its value in cents, using `decimal.Decimal`."""
+    try:
+        amount = decimal.Decimal(value)
+    except decimal.InvalidOperation:
+        raise ValueError(INVALID_FORMAT_MESSAGE)
+
+    if not amount.is_finite():
+        raise ValueError(INVALID_FORMAT_MESSAGE)
+
+    if amount.as_tuple().exponent < -2:
+        raise ValueError(TOO_MANY_DECIMALS_MESSAGE)
+
+    return int(amount.scaleb(2))
@@ -0,0 +1,79 @@
+"""
+Deterministic synthetic transactions for benchmarks and scale testing.
+"""
+import datetime
+import itertools
+import random
+
+# Ordered from the most to the least frequent category of each type
+CATEGORIES = {
+    'inflow': ('salary', 'transfer', 'savings', 'refund', 'investments', 'other'),
+    'outflow': (
+        'groceries', 'restaurants', 'transfer', 'transport', 'utilities', 'rent', 'shopping', 'health',
+        'entertainment', 'subscriptions', 'travel', 'education', 'insurance', 'taxes', 'other',
+    ),
+}
+FIRST_DATE = datetime.date(2020, 1, 1)
+
+
+def zipf_cum_weights(count: int, skew: float) -> list[float]:
+    """Return the cumulative weights of a Zipf distribution over `count` ranks, for `random.choices`."""
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def generate_transactions(count: int, users: int, seed: int = 0, prefix: str = '', days: int = 730,
+                          skew: float = 1.0):
+    """
+    Yield validated transactions (amounts in cents, dates as `datetime.date`), always the same ones for the
+    same arguments.
+
+    Users and categories follow a Zipf distribution, so a few users make most of the transactions and a few
+    categories are much more frequent than the others, and dates are spread uniformly.
+
+    Parameters
+    ----------
+    count : int
+        The number of transactions.
+
+    users : int
+        The number of distinct users, named user000000@email.com, user000001@email.com, ...
+
+    seed : int
+        The seed of the random generator.
+
+    prefix : str
+        The prefix of the references, which are the prefix followed by the transaction index.
+
+    days : int
+        The number of days, starting on 2020-01-01, the transactions are spread over.
+
+    skew : float
+        The exponent of the Zipf distributions. 0 spreads users and categories uniformly.
+    """
+    generator = random.Random(seed)
+    user_weights = zipf_cum_weights(users, skew)
+    category_weights = {type: zipf_cum_weights(len(categories), skew) for type, categories in CATEGORIES.items()}
+    user_indexes = range(users)
+
+    for index in range(count):
+        type = 'inflow' if generator.random() < 0.3 else 'outflow'
+        amount = generator.randint(1, 500000)
+        yield {
+            'reference': f'{prefix}{index:010}',
+            'user_email': user_email(generator.choices(user_indexes, cum_weights=user_weights)[0]),
+            'date': FIRST_DATE + datetime.timedelta(days=generator.randrange(days)),
+            'amount': amount if type == 'inflow' else -amount,
+            'type': type,
+            'category': generator.choices(CATEGORIES[type], cum_weights=category_weights[type])[0],
+        }
+
+
+def user_email(index: int) -> str:
+    return f'user{index:06}@email.com'
+
+
+def to_payload(row: dict) -> dict:
+    """Return a generated transaction in the format of the API payloads (example amount: '-51.13')."""
+    sign = '-' if row['amount'] < 0 else ''
+    cents = abs(row['amount'])
+    return dict(row, date=row['date'].isoformat(), amount=f'{sign}{cents // 100}.{cents % 100:02}')
@@ -0,0 +1,127 @@
+"""
+Benchmark scenarios of the transactions API, run through the whole Django stack with the test client.
+"""
+import math
+import statistics
+import time
+
+from django.test import Client
+from django.urls import reverse
+
+from transactions.benchmarks.data import generate_transactions, to_payload, user_email
+from transactions.cache import get_cache
+from transactions.ingestion import chunked, copy_transactions
+from transactions.models import Transaction
+
+BULK_PREFIX = 'benchmark-'
+SEED_CHUNK_SIZE = 50000
+
+
+def seed_transactions(count: int, users: int, seed: int):
+    """
+    Insert the generated transactions with COPY, unless the table already has them. Like any other write,
+    COPY bumps the versions of the transactions of the seeded users, so no summary cached before is served.
+    """
+    if Transaction.objects.count() == count:
+        return
+
+    Transaction.objects.all().delete()
+    for chunk in chunked(generate_transactions(count, users, seed), SEED_CHUNK_SIZE):
+        copy_transactions(chunk)
+
+
+def clear_cache():
+    """Drop the cached summaries, so the next request computes them from the database."""
+    get_cache().clear()
+
+
+def percentile(timings: list[float], rank: float) -> float:
+    """Return the nearest rank percentile of the timings."""
+    ordered = sorted(timings)
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(timings: list[float]) -> dict:
+    """Return the statistics of the timings of a scenario, in milliseconds."""
+    timings = [timing * 1000 for timing in timings]
+    return {
+        'runs': len(timings),
+        'min': min(timings),
+        'mean': statistics.fmean(timings),
+        'p50': percentile(timings, 50),
+        'p90': percentile(timings, 90),
+        'p99': percentile(timings, 99),
+        'max': max(timings),
+    }
+
+
+class Suite:
+    """
+    The benchmark scenarios: bulk creations of several sizes, the first page of the list, the per user summary,
+    the grouped by type listing and the streamed export. Each one runs `repeat` times after `warmup` runs.
+
+    The summaries are measured with the cache cleared before each run, computing them from the database, and
+    again served from the cache (the `_cached` scenarios).
+    """
+
+    def __init__(self, users: int, bulk_sizes: list[int], repeat: int, warmup: int):
+        self.client = Client()
+        self.users = users
+        self.bulk_sizes = bulk_sizes
+        self.repeat = repeat
+        self.warmup = warmup
+
+    def scenarios(self) -> dict:
+        list_url = reverse('transaction:transaction-list')
+        summary_url = reverse('transaction:transaction-summary', kwargs={'user_email': user_email(0)})
+        scenarios = {f'bulk_create_{size}': self.bulk_create_scenario(size) for size in self.bulk_sizes}
+        scenarios.update({
+            'list': (lambda: self.get(list_url, {'page_size': 100}), None, None),
+            'summary': (lambda: self.get(summary_url), clear_cache, None),
+            'summary_cached': (lambda: self.get(summary_url), None, None),
+            'group_by_type': (lambda: self.get(list_url, {'group_by': 'type'}), clear_cache, None),
+            'group_by_type_cached': (lambda: self.get(list_url, {'group_by': 'type'}), None, None),
+            'export': (lambda: self.get(reverse('transaction:transaction-export')), None, None),
+        })
+        return scenarios
+
+    def run(self) -> dict:
+        """Return the timing statistics of every scenario."""
+        results = {}
+        for name, (scenario, setup, cleanup) in self.scenarios().items():
+            timings = []
+            for run in range(self.warmup + self.repeat):
+                if setup:
+                    setup()
+                start = time.perf_counter()
+                scenario()
+                elapsed = time.perf_counter() - start
+                if cleanup:
+                    cleanup()
+                if run >= self.warmup:
+                    timings.append(elapsed)
+
+            results[name] = summarize(timings)
+
+        return results
+
+    def get(self, url: str, params: dict = None):
+        response = self.client.get(url, params)
+        assert response.status_code == 200, f'GET {url} returned {response.status_code}'
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+
+    def bulk_create_scenario(self, size: int) -> tuple:
+        """Return the bulk creation of `size` new transactions with a summary response, its setup and its cleanup."""
+        payload = [to_payload(row) for row in generate_transactions(size, self.users, prefix=BULK_PREFIX)]
+        url = reverse('transaction:transaction-list') + '?response=summary'
+
+        def scenario():
+            response = self.client.post(url, payload, content_type='application/json')
+            assert response.status_code == 201, f'POST {url} returned {response.status_code}'
+
+        def cleanup():
+            Transaction.objects.filter(reference__startswith=BULK_PREFIX).delete()
+
+        return scenario, None, cleanup
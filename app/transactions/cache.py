@@ -0,0 +1,106 @@
+"""
+Result cache of the transactions summaries, keyed by the version of the transactions of each user.
+
+The versions are kept in the database by triggers on the transactions table (see `TransactionVersion`), so
+every write bumps them, whatever the process (such as the import worker) or the SQL (such as COPY) that
+made it. Cached results of older versions are never read again, so every cached result of a user, whatever
+its query params, is dropped at once, without having to know their keys.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from transactions.models import TransactionVersion
+
+PREFIX = 'transactions'
+STATS = ('hits', 'misses')
+
+
+def get_cache():
+    return caches[settings.TRANSACTIONS_CACHE_ALIAS]
+
+
+def cached(key: str, user_email: str, version: int, compute):
+    """
+    Return the cached result of a query, or compute and cache it.
+
+    Parameters
+    ----------
+    key : str
+        The query name and params, such as 'summary:2020-01-01:'.
+
+    user_email : str
+        The user whose transactions the result depends on, or None when it depends on every user.
+
+    version : int
+        The version of the transactions of the user (or of every user), read before computing the result,
+        so the cached result is never older than its version.
+
+    compute : callable
+        Returns the result, which must be picklable.
+    """
+    cache = get_cache()
+    result_key = f'{get_scope(user_email)}:{version}:{key}'
+    result = cache.get(result_key)
+    if result is not None:
+        increment_stat('hits')
+        return result
+
+    increment_stat('misses')
+    result = compute()
+    cache.set(result_key, result, timeout=settings.TRANSACTIONS_CACHE_TIMEOUT)
+    return result
+
+
+def get_etag(key: str, user_email: str, version: int) -> str:
+    """Return a strong ETag of the result of a query, which changes with the version of the transactions."""
+    digest = hashlib.sha1(f'{get_scope(user_email)}:{version}:{key}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def get_version(user_email: str) -> int:
+    """
+    Return the version of the transactions of a user, or of every user when it is None.
+
+    The version of every user is the sum of the versions of each user, which grows with any write.
+    """
+    versions = TransactionVersion.objects.all()
+    if user_email is not None:
+        versions = versions.filter(user_email=user_email)
+
+    return versions.aggregate(version=Coalesce(Sum('version'), 0))['version']
+
+
+def get_scope(user_email: str) -> str:
+    if user_email is None:
+        return f'{PREFIX}:all'
+
+    return f'{PREFIX}:user:{hashlib.sha1(user_email.encode()).hexdigest()}'
+
+
+def increment_stat(name: str, delta: int = 1):
+    cache = get_cache()
+    key = f'{PREFIX}:stats:{name}'
+    if not cache.add(key, delta, timeout=None):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, timeout=None)
+
+
+def get_stats() -> dict:
+    """
+    Return the number of cache hits and misses, the number of invalidations and the hit rate of the cached queries.
+
+    Each write statement bumps the version of every user it touched, dropping their cached results, so the
+    invalidations are the sum of the versions of every user.
+    """
+    values = get_cache().get_many([f'{PREFIX}:stats:{name}' for name in STATS])
+    stats = {name: values.get(f'{PREFIX}:stats:{name}', 0) for name in STATS}
+    stats['invalidations'] = get_version(None)
+    reads = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / reads if reads else None
+    return stats
@@ -0,0 +1,23 @@
+"""
+System checks for transactions app.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+
+@register()
+def check_summaries_cache_is_shared(app_configs, **kwargs):
+    """Warn when the summaries cache is kept in the memory of each process, instead of being shared by all of them."""
+    if not isinstance(caches[settings.TRANSACTIONS_CACHE_ALIAS], LocMemCache):
+        return []
+
+    return [
+        Warning(
+            'The summaries cache is a local memory cache, so each process (such as each API worker) computes '
+            'and keeps its own results, and GET /transactions/cache-stats/ only counts the hits of one process.',
+            hint='Set REDIS_URL, or point TRANSACTIONS_CACHE_ALIAS to a cache shared by every process.',
+            id='transactions.W001',
+        )
+    ]
@@ -0,0 +1,123 @@
+"""
+Columnar exports of transactions, built from database cursors in record batches.
+"""
+import csv
+import io
+
+from django.conf import settings
+
+from transactions.ingestion import COLUMNS, chunked
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Output formats, with their content type and file extension. Arrow and Parquet need pyarrow
+COLUMNAR_OUTPUTS = ('arrow', 'parquet')
+EXPORT_OUTPUTS = {
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'csv': ('text/csv', 'csv'),
+}
+
+
+class ChunkSink(io.RawIOBase):
+    """Write only file that keeps the written bytes until they are drained, so they can be streamed."""
+
+    def __init__(self):
+        super(ChunkSink, self).__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        """Return the bytes written since the last drain."""
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_batches(transactions):
+    """Yield lists of transaction tuples with the `COLUMNS` values, read with a server-side cursor."""
+    batch_size = settings.TRANSACTIONS_EXPORT_CHUNK_SIZE
+    rows = transactions.values_list(*COLUMNS).iterator(chunk_size=batch_size)
+    return chunked(rows, batch_size)
+
+
+def export_transactions(transactions, output: str) -> tuple:
+    """
+    Return a lazy export of the transactions in a columnar format, with one record batch per chunk
+    of `TRANSACTIONS_EXPORT_CHUNK_SIZE` rows. Amounts are exported in cents.
+
+    Parameters
+    ----------
+    transactions : QuerySet
+        The transactions to export, already filtered and ordered.
+
+    output : str
+        `arrow` for an Arrow IPC stream, `parquet` or `csv`.
+
+    Returns
+    -------
+    tuple
+        The iterator of bytes of the export, its content type and its file extension.
+    """
+    content_type, extension = EXPORT_OUTPUTS[output]
+    if output == 'csv':
+        return iter_csv(transactions), content_type, extension
+
+    return iter_arrow(transactions, output), content_type, extension
+
+
+def iter_csv(transactions):
+    """Yield a CSV with a header row and the transactions, one batch at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+
+    for batch in iter_batches(transactions):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def iter_arrow(transactions, output: str):
+    """Yield an Arrow IPC stream or a Parquet file with the transactions, one record batch at a time."""
+    schema = pyarrow.schema([
+        ('reference', pyarrow.string()),
+        ('user_email', pyarrow.string()),
+        ('date', pyarrow.date32()),
+        ('amount', pyarrow.int64()),
+        ('type', pyarrow.string()),
+        ('category', pyarrow.string()),
+    ])
+    sink = ChunkSink()
+
+    if output == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+
+    for batch in iter_batches(transactions):
+        columns = [pyarrow.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+        writer.write_batch(pyarrow.RecordBatch.from_arrays(columns, schema=schema))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,141 @@
+"""
+Background processing of transaction import jobs.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from transactions.ingestion import chunked
+from transactions.models import ImportJob
+from transactions.serializers import TransactionSerializer, offset_errors
+
+
+class LeaseLost(Exception):
+    """The job was claimed again by another worker, after its lease expired."""
+
+
+def claim_job() -> ImportJob:
+    """
+    Mark the oldest pending job as running and return it, or None when there are no pending jobs.
+
+    Jobs are locked with SKIP LOCKED, so several workers can poll the queue without claiming the same job.
+    A running job whose lease was not renewed for `TRANSACTIONS_IMPORT_LEASE_SECONDS` (because its worker
+    crashed or lost its database connection) is claimed again, or failed once it was claimed
+    `TRANSACTIONS_IMPORT_MAX_ATTEMPTS` times.
+    """
+    while True:
+        expired = timezone.now() - timedelta(seconds=settings.TRANSACTIONS_IMPORT_LEASE_SECONDS)
+        with transaction.atomic():
+            job = (
+                ImportJob.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='pending') | Q(status='running', heartbeat_at__lt=expired))
+                .order_by('id')
+                .first()
+            )
+            if job is None:
+                return None
+
+            if job.attempts >= settings.TRANSACTIONS_IMPORT_MAX_ATTEMPTS:
+                message = f'The job was abandoned by its worker {job.attempts} times.'
+                finish_job(job, 'failed', errors={'non_field_errors': [message]})
+                continue
+
+            job.status = 'running'
+            job.attempts += 1
+            job.processed_rows = 0
+            job.started_at = job.heartbeat_at = timezone.now()
+            job.save(update_fields=['status', 'attempts', 'processed_rows', 'started_at', 'heartbeat_at'])
+
+        return job
+
+
+def renew_lease(job: ImportJob):
+    """
+    Save the progress of a running job and renew its lease.
+
+    Raises
+    ------
+    LeaseLost
+        If the job was claimed again by another worker since it was claimed by this one.
+    """
+    job.heartbeat_at = timezone.now()
+    renewed = ImportJob.objects.filter(pk=job.pk, status='running', attempts=job.attempts).update(
+        processed_rows=job.processed_rows, heartbeat_at=job.heartbeat_at
+    )
+    if not renewed:
+        raise LeaseLost(f'Import job {job.pk} was claimed again by another worker.')
+
+
+def process_job(job: ImportJob):
+    """
+    Validate the job payload in chunks of `TRANSACTIONS_STREAM_CHUNK_SIZE` rows, saving the progress
+    after each chunk, and then insert the valid transactions in a single database transaction.
+
+    The job ends as `succeeded` with the report of the bulk creation, or as `failed` with the errors
+    keyed by row index (or the error of the whole batch). The lease of the job is renewed after each chunk.
+
+    Raises
+    ------
+    LeaseLost
+        If the job was claimed again by another worker, in which case it is left to that worker.
+    """
+    # The references seen in every chunk, since the chunks are only inserted once all of them are validated
+    context = {'on_conflict': job.on_conflict, 'on_error': job.on_error, 'references': set()}
+    serializers = []
+    errors = {}
+
+    for offset, chunk in enumerate_chunks(job.payload, settings.TRANSACTIONS_STREAM_CHUNK_SIZE):
+        serializer = TransactionSerializer(data=chunk, many=True, context=context)
+        if not serializer.is_valid():
+            return finish_job(job, 'failed', errors=offset_errors(serializer.errors, offset))
+
+        errors.update(offset_errors(serializer.row_errors, offset))
+        serializers.append(serializer)
+        job.processed_rows = offset + len(chunk)
+        renew_lease(job)
+
+    report = Counter()
+    try:
+        with transaction.atomic():
+            # Keeps the job row locked until the transactions are committed along with the job status,
+            # so the job cannot be claimed again while they are inserted
+            renew_lease(job)
+            for serializer in serializers:
+                serializer.save()
+                report.update({key: value for key, value in serializer.report.items() if key != 'errors'})
+            finish_job(job, 'succeeded', report=dict(report), errors=errors)
+    except ValidationError as exc:
+        return finish_job(job, 'failed', errors={'non_field_errors': exc.detail})
+
+
+def enumerate_chunks(rows: list, size: int):
+    """Yield each chunk of the rows along with the index of its first row."""
+    offset = 0
+    for chunk in chunked(rows, size):
+        yield offset, chunk
+        offset += len(chunk)
+
+
+def finish_job(job: ImportJob, status: str, report: dict = None, errors: dict = None):
+    """
+    Save the final status of a running job, along with its report and errors.
+
+    Raises
+    ------
+    LeaseLost
+        If the job was claimed again by another worker since it was claimed by this one.
+    """
+    job.status = status
+    job.report = report or {}
+    job.errors = errors or {}
+    job.finished_at = timezone.now()
+    finished = ImportJob.objects.filter(pk=job.pk, status='running', attempts=job.attempts).update(
+        status=job.status, report=job.report, errors=job.errors, finished_at=job.finished_at
+    )
+    if not finished:
+        raise LeaseLost(f'Import job {job.pk} was claimed again by another worker.')
@@ -0,0 +1,207 @@
+"""
+Database insert paths for transactions bulk creation.
+"""
+import csv
+import io
+import itertools
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from psycopg2.extras import execute_values
+
+from transactions.models import Transaction
+
+TABLE = Transaction._meta.db_table
+COLUMNS = ('reference', 'user_email', 'date', 'amount', 'type', 'category')
+COLUMNS_SQL = ', '.join(COLUMNS)
+ON_CONFLICT_CHOICES = ('ignore', 'update')
+STAGING_TABLE = 'transactions_transaction_staging'
+
+
+class PartialInsertError(IntegrityError):
+    """An insert in committed chunks that failed after `created` transactions were already committed."""
+
+    def __init__(self, created: int):
+        super().__init__(f'{created} transactions were created before the failing chunk.')
+        self.created = created
+
+
+def chunked(rows, size: int):
+    """Yield lists of at most `size` items from any iterable of rows, consuming it lazily."""
+    iterator = iter(rows)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def insert_transactions(rows: list[dict]) -> list:
+    """
+    Insert validated transactions, using COPY for batches above `TRANSACTIONS_COPY_THRESHOLD` rows.
+
+    Parameters
+    ----------
+    rows : list[dict]
+        The validated transactions.
+
+    Returns
+    -------
+    list
+        The created `Transaction` instances, or the validated rows themselves when inserted through COPY.
+    """
+    if len(rows) >= settings.TRANSACTIONS_COPY_THRESHOLD:
+        copy_transactions(rows)
+        return rows
+
+    return bulk_create_transactions(rows)
+
+
+def bulk_create_transactions(rows: list[dict]) -> list:
+    """
+    Insert validated transactions with one INSERT statement per chunk of `TRANSACTIONS_BULK_CREATE_BATCH_SIZE`
+    rows, using the `TRANSACTIONS_BULK_CREATE_BACKEND`: `orm` for bulk_create, or `execute_values` to send
+    the validated values without instantiating models.
+
+    The chunks are inserted in a single database transaction, or each one in its own transaction when
+    `TRANSACTIONS_BULK_CREATE_ATOMIC` is False, so the chunks inserted before a failing one are kept.
+    Inside an outer transaction (such as the one of streamed payloads), per chunk transactions are savepoints,
+    so nothing is committed before the outer transaction ends.
+
+    The rows are inserted sorted by `(user_email, type, category)`, so the statement triggers of the chunks
+    lock the version and rollup rows in ascending order across the whole database transaction, and two
+    concurrent chunked insertions cannot deadlock each other.
+
+    Returns
+    -------
+    list
+        The created `Transaction` instances, or the validated rows themselves with `execute_values`, in the
+        order of the rows.
+
+    Raises
+    ------
+    IntegrityError
+        If the data has transactions with a reference that already exists.
+
+    PartialInsertError
+        If the failing chunk comes after chunks that were already committed.
+    """
+    atomic = settings.TRANSACTIONS_BULK_CREATE_ATOMIC
+    batch_size = settings.TRANSACTIONS_BULK_CREATE_BATCH_SIZE or max(len(rows), 1)
+    backend = settings.TRANSACTIONS_BULK_CREATE_BACKEND
+    commits_chunks = not atomic and not connection.in_atomic_block
+    order = sorted(range(len(rows)), key=lambda index: rollup_key(rows[index]))
+    instances = [None] * len(rows)
+    created = 0
+
+    try:
+        with transaction.atomic() if atomic else nullcontext():
+            for indexes in chunked(order, batch_size):
+                chunk = [rows[index] for index in indexes]
+                with nullcontext() if atomic else transaction.atomic():
+                    if backend == 'execute_values':
+                        insert_values(chunk)
+                    else:
+                        chunk = Transaction.objects.bulk_create([Transaction(**row) for row in chunk])
+
+                for index, instance in zip(indexes, chunk):
+                    instances[index] = instance
+                created += len(chunk)
+    except IntegrityError as exc:
+        if commits_chunks and created:
+            raise PartialInsertError(created) from exc
+        raise
+
+    return instances
+
+
+def rollup_key(row: dict) -> tuple:
+    """Return the key of the rollup row of a transaction, which is also the order its rows are locked in."""
+    return row['user_email'], row['type'], row['category']
+
+
+def insert_values(rows: list[dict]):
+    """Insert validated transactions in a single `INSERT ... VALUES` statement built by psycopg2."""
+    with connection.cursor() as cursor:
+        execute_values(
+            cursor,
+            f'INSERT INTO {TABLE} ({COLUMNS_SQL}) VALUES %s',
+            [tuple(row[column] for column in COLUMNS) for row in rows],
+            page_size=len(rows),
+        )
+
+
+def copy_transactions(rows: list[dict]):
+    """
+    Insert validated transactions without instantiating models, streaming them with
+    COPY FROM STDIN into a staging table that is then merged into the transactions table.
+
+    Raises
+    ------
+    IntegrityError
+        If the data has transactions with a reference that already exists.
+    """
+    with staging_table(rows) as cursor:
+        cursor.execute(f'INSERT INTO {TABLE} ({COLUMNS_SQL}) SELECT {COLUMNS_SQL} FROM {STAGING_TABLE}')
+
+
+def upsert_transactions(rows: list[dict], on_conflict: str) -> dict:
+    """
+    Insert validated transactions in a single `INSERT ... ON CONFLICT (reference)` statement.
+
+    Parameters
+    ----------
+    rows : list[dict]
+        The validated transactions.
+
+    on_conflict : str
+        `ignore` to skip transactions whose reference already exists, or `update` to overwrite them
+        with the new values. When a reference is repeated in the batch, its last occurrence is used.
+
+    Returns
+    -------
+    dict
+        The number of inserted, skipped and updated transactions.
+    """
+    if on_conflict == 'update':
+        updated_columns = [column for column in COLUMNS if column != 'reference']
+        conflict_action = 'DO UPDATE SET {} WHERE ({}) IS DISTINCT FROM ({})'.format(
+            ', '.join(f'{column} = EXCLUDED.{column}' for column in updated_columns),
+            ', '.join(f'{TABLE}.{column}' for column in updated_columns),
+            ', '.join(f'EXCLUDED.{column}' for column in updated_columns),
+        )
+    else:
+        conflict_action = 'DO NOTHING'
+
+    with staging_table(rows) as cursor:
+        cursor.execute(f"""
+            WITH merged AS (
+                INSERT INTO {TABLE} ({COLUMNS_SQL})
+                SELECT DISTINCT ON (reference) {COLUMNS_SQL} FROM {STAGING_TABLE} ORDER BY reference, position DESC
+                ON CONFLICT (reference) {conflict_action}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+        """)
+        inserted, updated = cursor.fetchone()
+
+    return {'inserted': inserted, 'skipped': len(rows) - inserted - updated, 'updated': updated}
+
+
+@contextmanager
+def staging_table(rows: list[dict]):
+    """
+    Copy validated transactions into a temporary staging table, keeping their position in the batch,
+    and yield the cursor to merge them into the transactions table inside the same database transaction.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerows([row[column] for column in COLUMNS] for row in rows)
+    buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {STAGING_TABLE} (LIKE {TABLE} INCLUDING DEFAULTS, position bigserial) '
+            'ON COMMIT DROP'
+        )
+        cursor.copy_expert(f'COPY {STAGING_TABLE} ({COLUMNS_SQL}) FROM STDIN WITH (FORMAT csv)', buffer)
+        yield cursor
+        cursor.execute(f'DROP TABLE {STAGING_TABLE}')
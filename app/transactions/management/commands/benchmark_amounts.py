@@ -0,0 +1,26 @@
+"""
+Benchmark of the transaction amounts parsing.
+"""
+import decimal
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from transactions.amounts import parse_amount
+from transactions.tests.fixtures.big_transactions_payload import big_transactions_test_payload
+
+
+class Command(BaseCommand):
+    help = 'Compare the amount parsing with a plain Decimal conversion on the big transactions payload.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Number of runs of each case.')
+
+    def handle(self, *args, **options):
+        amounts = [item['amount'] for item in big_transactions_test_payload]
+        self.stdout.write(f'{len(amounts)} amounts, best of {options["repeat"]} runs')
+
+        cases = [('Decimal', lambda amount: int(decimal.Decimal(amount) * 100)), ('parse_amount', parse_amount)]
+        for name, parse in cases:
+            best = min(timeit.repeat(lambda: [parse(amount) for amount in amounts], number=1, repeat=options['repeat']))
+            self.stdout.write(f'{name:<16}{best * 1000:8.2f}ms')
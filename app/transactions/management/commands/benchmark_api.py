@@ -0,0 +1,88 @@
+"""
+Reproducible benchmark of the transactions API.
+"""
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from transactions.benchmarks.suite import Suite, seed_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark bulk creations, list, summary, group_by=type and export on a test database seeded with '
+        'deterministic transactions, writing the percentiles of each scenario as JSON. With --baseline, fail '
+        'when the median of a scenario is slower than the baseline by more than --tolerance.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=100000, help='Number of seeded transactions.')
+        parser.add_argument('--users', type=int, default=1000, help='Number of users of the seeded transactions.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generated transactions.')
+        parser.add_argument('--bulk-sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                            help='Number of transactions of each bulk creation scenario.')
+        parser.add_argument('--repeat', type=int, default=20, help='Measured runs of each scenario.')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured runs before each scenario.')
+        parser.add_argument('--output', default='benchmark-results.json', help='Path of the JSON results.')
+        parser.add_argument('--baseline', help='Path of the JSON results of a previous run to compare with.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Accepted slowdown of the median against the baseline (0.2 is 20%%).')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the seeded test database, to reuse it on the next run.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            seed_transactions(options['transactions'], options['users'], options['seed'])
+            suite = Suite(options['users'], options['bulk_sizes'], options['repeat'], options['warmup'])
+            results = suite.run()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'transactions': options['transactions'],
+                'users': options['users'],
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+                'warmup': options['warmup'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+
+        for name, stats in results.items():
+            self.stdout.write(f'{name:<24}p50 {stats["p50"]:>9.2f}ms  p90 {stats["p90"]:>9.2f}ms  '
+                              f'p99 {stats["p99"]:>9.2f}ms')
+
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def compare(self, results: dict, baseline_path: str, tolerance: float):
+        """
+        Raises
+        ------
+        CommandError
+            If the median of any scenario is slower than the baseline by more than the tolerance.
+        """
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+        regressions = []
+        for name, stats in results.items():
+            if name in baseline and stats['p50'] > baseline[name]['p50'] * (1 + tolerance):
+                regressions.append(f'{name}: p50 {baseline[name]["p50"]:.2f}ms -> {stats["p50"]:.2f}ms')
+
+        if regressions:
+            raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+
+        self.stdout.write(f'No regressions against {baseline_path}.')
@@ -0,0 +1,77 @@
+"""
+Benchmark of the bulk_create insert path of transactions.
+"""
+import datetime
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from transactions.ingestion import bulk_create_transactions
+from transactions.models import Transaction
+
+REFERENCE_PREFIX = 'benchmark-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the throughput and the peak memory of bulk_create in a single statement, in chunks in a single '
+        'database transaction, in chunks with a transaction each, and of the execute_values backend. '
+        'The inserted transactions are deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='Number of transactions of each run.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per chunk of the chunked runs.')
+
+    def handle(self, *args, **options):
+        cases = [
+            ('single statement', None, True, 'orm'),
+            ('chunked, atomic', options['batch_size'], True, 'orm'),
+            ('chunked, per chunk', options['batch_size'], False, 'orm'),
+            ('execute_values', options['batch_size'], True, 'execute_values'),
+        ]
+
+        for total in options['rows']:
+            rows = self.build_rows(total)
+            for name, batch_size, atomic, backend in cases:
+                with override_settings(TRANSACTIONS_BULK_CREATE_BATCH_SIZE=batch_size,
+                                       TRANSACTIONS_BULK_CREATE_ATOMIC=atomic,
+                                       TRANSACTIONS_BULK_CREATE_BACKEND=backend):
+                    elapsed = self.run(rows, trace=False)
+                    peak = self.run(rows, trace=True)
+
+                self.stdout.write(
+                    f'{total:>9} rows  {name:<20}{total / elapsed:>10.0f} rows/s{peak / 2 ** 20:>10.1f}MiB peak'
+                )
+
+    def build_rows(self, total: int) -> list[dict]:
+        return [
+            {
+                'reference': f'{REFERENCE_PREFIX}{index:09}',
+                'user_email': f'user{index % 1000}@email.com',
+                'date': datetime.date(2020, 1, 1) + datetime.timedelta(days=index % 365),
+                'amount': -5113,
+                'type': 'outflow',
+                'category': 'groceries',
+            }
+            for index in range(total)
+        ]
+
+    def run(self, rows: list[dict], trace: bool) -> float:
+        """Insert the rows and delete them, returning the insert time in seconds or its peak traced memory."""
+        if trace:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        bulk_create_transactions(rows)
+        elapsed = time.perf_counter() - start
+
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        Transaction.objects.filter(reference__startswith=REFERENCE_PREFIX).delete()
+        return peak if trace else elapsed
@@ -0,0 +1,36 @@
+"""
+Benchmark of the JSON parser and renderer of the transactions API.
+"""
+import io
+import json
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from transactions.parsers import FastJSONParser
+from transactions.renderers import FastJSONRenderer
+from transactions.tests.fixtures.big_transactions_payload import big_transactions_test_payload
+
+
+class Command(BaseCommand):
+    help = 'Compare the stdlib and the fast JSON parser and renderer on the big transactions payload.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Number of runs of each case.')
+
+    def handle(self, *args, **options):
+        payload = big_transactions_test_payload
+        body = json.dumps(payload).encode()
+        self.stdout.write(f'{len(payload)} transactions, {len(body)} bytes, best of {options["repeat"]} runs')
+
+        for name, parser in [('JSONParser', JSONParser()), ('FastJSONParser', FastJSONParser())]:
+            self.report(name, lambda: parser.parse(io.BytesIO(body)), options['repeat'])
+
+        for name, renderer in [('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())]:
+            self.report(name, lambda: renderer.render(payload), options['repeat'])
+
+    def report(self, name: str, case, repeat: int):
+        best = min(timeit.repeat(case, number=1, repeat=repeat))
+        self.stdout.write(f'{name:<20}{best * 1000:8.2f}ms')
@@ -0,0 +1,76 @@
+"""
+Generator of synthetic transactions for scale testing.
+"""
+import csv
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.benchmarks.data import generate_transactions, to_payload
+from transactions.ingestion import chunked, copy_transactions
+from transactions.parsers import CSVParser
+
+FILE_FORMATS = ('json', 'ndjson', 'csv')
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate seeded synthetic transactions, with Zipf distributed users and categories, and insert them '
+        'into the database with COPY, or write them to a JSON, NDJSON or CSV file in the API payload format.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help='Number of transactions.')
+        parser.add_argument('--users', type=int, default=10000, help='Number of distinct users.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+        parser.add_argument('--days', type=int, default=730, help='Number of days the dates are spread over.')
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Exponent of the Zipf distributions of users and categories (0 is uniform).')
+        parser.add_argument('--prefix', default='', help='Prefix of the references.')
+        parser.add_argument('--output', help='Path of the file to write, instead of inserting into the database.')
+        parser.add_argument('--format', choices=FILE_FORMATS,
+                            help='Format of the output file. Defaults to the extension of the output path.')
+        parser.add_argument('--chunk-size', type=int, default=50000,
+                            help='Transactions inserted with COPY in each database transaction.')
+
+    def handle(self, *args, **options):
+        rows = generate_transactions(
+            options['count'], options['users'], seed=options['seed'], prefix=options['prefix'],
+            days=options['days'], skew=options['skew'],
+        )
+
+        if options['output'] is None:
+            inserted = 0
+            for chunk in chunked(rows, options['chunk_size']):
+                copy_transactions(chunk)
+                inserted += len(chunk)
+                self.stdout.write(f'Inserted {inserted} transactions.')
+            return
+
+        file_format = options['format'] or os.path.splitext(options['output'])[1].lstrip('.')
+        if file_format not in FILE_FORMATS:
+            raise CommandError(f'Unknown output format "{file_format}", use --format with one of: '
+                               f'{", ".join(FILE_FORMATS)}.')
+
+        with open(options['output'], 'w', newline='') as output:
+            getattr(self, f'write_{file_format}')(output, (to_payload(row) for row in rows))
+
+        self.stdout.write(f'Wrote {options["count"]} transactions to {options["output"]}.')
+
+    def write_json(self, output, rows):
+        """Write a JSON array with one transaction per line, without building it in memory."""
+        separator = '[\n'
+        for row in rows:
+            output.write(separator + json.dumps(row))
+            separator = ',\n'
+        output.write('[]\n' if separator == '[\n' else '\n]\n')
+
+    def write_ndjson(self, output, rows):
+        for row in rows:
+            output.write(json.dumps(row) + '\n')
+
+    def write_csv(self, output, rows):
+        writer = csv.DictWriter(output, fieldnames=CSVParser.columns)
+        writer.writeheader()
+        writer.writerows(rows)
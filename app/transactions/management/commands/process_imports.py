@@ -0,0 +1,58 @@
+"""
+Worker that processes the queued transaction import jobs.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from transactions.imports import LeaseLost, claim_job, finish_job, process_job
+
+
+class Command(BaseCommand):
+    help = 'Process the pending transaction import jobs, polling the database for new ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once there are no pending jobs.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait between polls.')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                job = claim_job()
+            except DatabaseError as exc:
+                if options['once']:
+                    raise
+                self.stderr.write(f'Could not claim an import job: {exc}')
+                connection.close()
+                time.sleep(options['interval'])
+                continue
+
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+
+            try:
+                process_job(job)
+            except LeaseLost as exc:
+                self.stderr.write(str(exc))
+            except Exception as exc:
+                self.stderr.write(f'Import job {job.pk} failed: {exc}')
+                self.fail_job(job, exc)
+            else:
+                self.stdout.write(f'Import job {job.pk} {job.status}.')
+
+    def fail_job(self, job, exc: Exception):
+        """
+        Save the error of a failed job. When the database cannot be reached, the connection is dropped and the
+        job is left running, so it is claimed again once its lease expires.
+        """
+        try:
+            finish_job(job, 'failed', errors={'non_field_errors': [str(exc)]})
+        except LeaseLost as lost:
+            self.stderr.write(str(lost))
+        except DatabaseError as error:
+            self.stderr.write(f'Could not save the error of import job {job.pk}: {error}')
+            connection.close()
@@ -0,0 +1,30 @@
+# Generated by Django 4.1.13 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('succeeded', 'succeeded'), ('failed', 'failed')], default='pending', max_length=255)),
+                ('payload', models.JSONField()),
+                ('on_conflict', models.CharField(choices=[('ignore', 'ignore'), ('update', 'update')], max_length=255, null=True)),
+                ('on_error', models.CharField(choices=[('abort', 'abort'), ('skip', 'skip')], default='abort', max_length=255)),
+                ('total_rows', models.IntegerField()),
+                ('processed_rows', models.IntegerField(default=0)),
+                ('report', models.JSONField(default=dict)),
+                ('errors', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(null=True)),
+                ('finished_at', models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
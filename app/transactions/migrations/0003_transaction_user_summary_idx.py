@@ -0,0 +1,20 @@
+# Generated by Django 4.1.13 on 2026-10-18 13:13
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('transactions', '0002_importjob'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['user_email', 'type', 'category'], include=('amount',), name='transaction_user_summary_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 4.1.13 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+# Statement level triggers fold each INSERT, UPDATE or DELETE on the transactions table into the
+# rollup table using the transition tables, so bulk_create, COPY and ON CONFLICT merges are covered too.
+ROLLUP_TRIGGERS_SQL = """
+CREATE FUNCTION transactions_rollup_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO transactions_transactionrollup (user_email, type, category, total_amount, count)
+        SELECT user_email, type, category, SUM(amount), COUNT(*)
+        FROM new_rows
+        GROUP BY user_email, type, category
+        ORDER BY user_email, type, category
+        ON CONFLICT (user_email, type, category) DO UPDATE SET
+            total_amount = transactions_transactionrollup.total_amount + EXCLUDED.total_amount,
+            count = transactions_transactionrollup.count + EXCLUDED.count;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO transactions_transactionrollup (user_email, type, category, total_amount, count)
+        SELECT user_email, type, category, -SUM(amount), -COUNT(*)
+        FROM old_rows
+        GROUP BY user_email, type, category
+        ORDER BY user_email, type, category
+        ON CONFLICT (user_email, type, category) DO UPDATE SET
+            total_amount = transactions_transactionrollup.total_amount + EXCLUDED.total_amount,
+            count = transactions_transactionrollup.count + EXCLUDED.count;
+
+        DELETE FROM transactions_transactionrollup rollup
+        USING (SELECT DISTINCT user_email, type, category FROM old_rows) removed
+        WHERE rollup.count = 0
+            AND rollup.user_email = removed.user_email
+            AND rollup.type = removed.type
+            AND rollup.category = removed.category;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION transactions_rollup_truncate() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE transactions_transactionrollup;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_rollup_insert AFTER INSERT ON transactions_transaction
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION transactions_rollup_apply();
+
+CREATE TRIGGER transactions_rollup_update AFTER UPDATE ON transactions_transaction
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION transactions_rollup_apply();
+
+CREATE TRIGGER transactions_rollup_delete AFTER DELETE ON transactions_transaction
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION transactions_rollup_apply();
+
+CREATE TRIGGER transactions_rollup_truncate AFTER TRUNCATE ON transactions_transaction
+FOR EACH STATEMENT EXECUTE FUNCTION transactions_rollup_truncate();
+
+INSERT INTO transactions_transactionrollup (user_email, type, category, total_amount, count)
+SELECT user_email, type, category, SUM(amount), COUNT(*)
+FROM transactions_transaction
+GROUP BY user_email, type, category;
+"""
+
+DROP_ROLLUP_TRIGGERS_SQL = """
+DROP TRIGGER transactions_rollup_insert ON transactions_transaction;
+DROP TRIGGER transactions_rollup_update ON transactions_transaction;
+DROP TRIGGER transactions_rollup_delete ON transactions_transaction;
+DROP TRIGGER transactions_rollup_truncate ON transactions_transaction;
+DROP FUNCTION transactions_rollup_apply();
+DROP FUNCTION transactions_rollup_truncate();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_transaction_user_summary_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_email', models.EmailField(max_length=255)),
+                ('type', models.CharField(choices=[('inflow', 'inflow'), ('outflow', 'outflow')], max_length=255)),
+                ('category', models.CharField(max_length=255)),
+                ('total_amount', models.BigIntegerField(default=0)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='transactionrollup',
+            constraint=models.UniqueConstraint(fields=('user_email', 'type', 'category'), name='transaction_rollup_unique'),
+        ),
+        migrations.RunSQL(ROLLUP_TRIGGERS_SQL, DROP_ROLLUP_TRIGGERS_SQL),
+    ]
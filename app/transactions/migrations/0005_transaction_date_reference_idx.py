@@ -0,0 +1,20 @@
+# Generated by Django 4.1.13 on 2026-10-18 13:24
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('transactions', '0004_transactionrollup'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['date', 'reference'], name='transaction_date_reference_idx'),
+        ),
+    ]
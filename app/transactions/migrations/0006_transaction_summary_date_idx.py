@@ -0,0 +1,24 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:02
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('transactions', '0005_transaction_date_reference_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['user_email', 'type', 'category'], include=('amount', 'date'), name='transaction_summary_date_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='transaction',
+            name='transaction_user_summary_idx',
+        ),
+    ]
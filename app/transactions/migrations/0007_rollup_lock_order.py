@@ -0,0 +1,119 @@
+# Generated by Django 4.1.13 on 2026-10-18 16:05
+
+from django.db import migrations
+
+# An UPDATE folds its new rows in and its old rows out of the rollup in a single statement, so the rollup
+# rows it touches are locked in key order, like the ones of an INSERT or a DELETE. The TRUNCATE trigger
+# deletes the rollup rows instead of truncating the table, which fails when both tables are truncated by
+# the same statement (as `manage.py flush` does).
+ROLLUP_TRIGGERS_SQL = """
+CREATE OR REPLACE FUNCTION transactions_rollup_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO transactions_transactionrollup (user_email, type, category, total_amount, count)
+        SELECT user_email, type, category, SUM(amount), COUNT(*)
+        FROM new_rows
+        GROUP BY user_email, type, category
+        ORDER BY user_email, type, category
+        ON CONFLICT (user_email, type, category) DO UPDATE SET
+            total_amount = transactions_transactionrollup.total_amount + EXCLUDED.total_amount,
+            count = transactions_transactionrollup.count + EXCLUDED.count;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO transactions_transactionrollup (user_email, type, category, total_amount, count)
+        SELECT user_email, type, category, SUM(amount), SUM(count)
+        FROM (
+            SELECT user_email, type, category, amount, 1 AS count FROM new_rows
+            UNION ALL
+            SELECT user_email, type, category, -amount, -1 FROM old_rows
+        ) changes
+        GROUP BY user_email, type, category
+        ORDER BY user_email, type, category
+        ON CONFLICT (user_email, type, category) DO UPDATE SET
+            total_amount = transactions_transactionrollup.total_amount + EXCLUDED.total_amount,
+            count = transactions_transactionrollup.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO transactions_transactionrollup (user_email, type, category, total_amount, count)
+        SELECT user_email, type, category, -SUM(amount), -COUNT(*)
+        FROM old_rows
+        GROUP BY user_email, type, category
+        ORDER BY user_email, type, category
+        ON CONFLICT (user_email, type, category) DO UPDATE SET
+            total_amount = transactions_transactionrollup.total_amount + EXCLUDED.total_amount,
+            count = transactions_transactionrollup.count + EXCLUDED.count;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM transactions_transactionrollup rollup
+        USING (SELECT DISTINCT user_email, type, category FROM old_rows) removed
+        WHERE rollup.count = 0
+            AND rollup.user_email = removed.user_email
+            AND rollup.type = removed.type
+            AND rollup.category = removed.category;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION transactions_rollup_truncate() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM transactions_transactionrollup;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+PREVIOUS_ROLLUP_TRIGGERS_SQL = """
+CREATE OR REPLACE FUNCTION transactions_rollup_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO transactions_transactionrollup (user_email, type, category, total_amount, count)
+        SELECT user_email, type, category, SUM(amount), COUNT(*)
+        FROM new_rows
+        GROUP BY user_email, type, category
+        ORDER BY user_email, type, category
+        ON CONFLICT (user_email, type, category) DO UPDATE SET
+            total_amount = transactions_transactionrollup.total_amount + EXCLUDED.total_amount,
+            count = transactions_transactionrollup.count + EXCLUDED.count;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO transactions_transactionrollup (user_email, type, category, total_amount, count)
+        SELECT user_email, type, category, -SUM(amount), -COUNT(*)
+        FROM old_rows
+        GROUP BY user_email, type, category
+        ORDER BY user_email, type, category
+        ON CONFLICT (user_email, type, category) DO UPDATE SET
+            total_amount = transactions_transactionrollup.total_amount + EXCLUDED.total_amount,
+            count = transactions_transactionrollup.count + EXCLUDED.count;
+
+        DELETE FROM transactions_transactionrollup rollup
+        USING (SELECT DISTINCT user_email, type, category FROM old_rows) removed
+        WHERE rollup.count = 0
+            AND rollup.user_email = removed.user_email
+            AND rollup.type = removed.type
+            AND rollup.category = removed.category;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION transactions_rollup_truncate() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE transactions_transactionrollup;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_transaction_summary_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(ROLLUP_TRIGGERS_SQL, PREVIOUS_ROLLUP_TRIGGERS_SQL),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.1.13 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+# Statement level triggers bump the version of every user whose transactions an INSERT, UPDATE or DELETE
+# touched (both the old and the new user of an UPDATE), in key order like the rollup. A TRUNCATE bumps
+# every version instead of deleting them, so a version never goes back to a previous value.
+VERSION_TRIGGERS_SQL = """
+CREATE FUNCTION transactions_version_bump() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO transactions_transactionversion (user_email, version)
+        SELECT DISTINCT user_email, 1 FROM new_rows
+        ORDER BY user_email
+        ON CONFLICT (user_email) DO UPDATE SET version = transactions_transactionversion.version + 1;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO transactions_transactionversion (user_email, version)
+        SELECT user_email, 1 FROM (SELECT user_email FROM new_rows UNION SELECT user_email FROM old_rows) users
+        ORDER BY user_email
+        ON CONFLICT (user_email) DO UPDATE SET version = transactions_transactionversion.version + 1;
+    ELSE
+        INSERT INTO transactions_transactionversion (user_email, version)
+        SELECT DISTINCT user_email, 1 FROM old_rows
+        ORDER BY user_email
+        ON CONFLICT (user_email) DO UPDATE SET version = transactions_transactionversion.version + 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION transactions_version_bump_all() RETURNS trigger AS $$
+BEGIN
+    UPDATE transactions_transactionversion SET version = version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_version_insert AFTER INSERT ON transactions_transaction
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION transactions_version_bump();
+
+CREATE TRIGGER transactions_version_update AFTER UPDATE ON transactions_transaction
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION transactions_version_bump();
+
+CREATE TRIGGER transactions_version_delete AFTER DELETE ON transactions_transaction
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION transactions_version_bump();
+
+CREATE TRIGGER transactions_version_truncate AFTER TRUNCATE ON transactions_transaction
+FOR EACH STATEMENT EXECUTE FUNCTION transactions_version_bump_all();
+
+INSERT INTO transactions_transactionversion (user_email, version)
+SELECT DISTINCT user_email, 1 FROM transactions_transaction;
+"""
+
+DROP_VERSION_TRIGGERS_SQL = """
+DROP TRIGGER transactions_version_insert ON transactions_transaction;
+DROP TRIGGER transactions_version_update ON transactions_transaction;
+DROP TRIGGER transactions_version_delete ON transactions_transaction;
+DROP TRIGGER transactions_version_truncate ON transactions_transaction;
+DROP FUNCTION transactions_version_bump();
+DROP FUNCTION transactions_version_bump_all();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_importjob_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_email', models.EmailField(max_length=255, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(VERSION_TRIGGERS_SQL, DROP_VERSION_TRIGGERS_SQL),
+    ]
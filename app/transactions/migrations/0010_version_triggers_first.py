@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:30
+
+from django.db import migrations
+
+# Triggers on the same event fire in name order, so the version triggers are renamed to fire before the rollup
+# ones. Every statement then locks the version row of a user before any of its rollup rows, and a transaction
+# that inserts its rows sorted by user across several statements takes all of its locks in ascending order.
+RENAMES = [
+    ('transactions_version_insert', 'transactions_bump_version_insert'),
+    ('transactions_version_update', 'transactions_bump_version_update'),
+    ('transactions_version_delete', 'transactions_bump_version_delete'),
+    ('transactions_version_truncate', 'transactions_bump_version_truncate'),
+]
+
+
+def rename_triggers(renames):
+    return '\n'.join(
+        f'ALTER TRIGGER {name} ON transactions_transaction RENAME TO {new_name};' for name, new_name in renames
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_transactionversion'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            rename_triggers(RENAMES),
+            rename_triggers([(new_name, name) for name, new_name in RENAMES]),
+        ),
+    ]
@@ -9,5 +9,74 @@ class Transaction(models.Model):
     type = models.CharField(max_length=255, choices=(('inflow', 'inflow'), ('outflow', 'outflow')))
     category = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            # Covers the per user summaries, including the date windows and buckets, with index only scans
+            models.Index(
+                fields=['user_email', 'type', 'category'], include=['amount', 'date'],
+                name='transaction_summary_date_idx'
+            ),
+            # Serves the keyset pagination of the transactions list
+            models.Index(fields=['date', 'reference'], name='transaction_date_reference_idx'),
+        ]
+
     def __str__(self):
         return self.reference
+
+
+class ImportJob(models.Model):
+    status = models.CharField(max_length=255, default='pending', choices=(
+        ('pending', 'pending'), ('running', 'running'), ('succeeded', 'succeeded'), ('failed', 'failed')
+    ))
+    payload = models.JSONField()
+    on_conflict = models.CharField(max_length=255, null=True, choices=(('ignore', 'ignore'), ('update', 'update')))
+    on_error = models.CharField(max_length=255, default='abort', choices=(('abort', 'abort'), ('skip', 'skip')))
+    total_rows = models.IntegerField()
+    processed_rows = models.IntegerField(default=0)
+    report = models.JSONField(default=dict)
+    errors = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    heartbeat_at = models.DateTimeField(null=True)
+    attempts = models.IntegerField(default=0)
+    finished_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f'{self.pk} ({self.status})'
+
+
+class TransactionRollup(models.Model):
+    """
+    Running totals of the transactions per user, type and category.
+
+    Kept up to date by database triggers on the transactions table (see migration 0004), in the same
+    database transaction of every insert, update and delete, including the ones made with raw SQL.
+    """
+    user_email = models.EmailField(max_length=255)
+    type = models.CharField(max_length=255, choices=(('inflow', 'inflow'), ('outflow', 'outflow')))
+    category = models.CharField(max_length=255)
+    total_amount = models.BigIntegerField(default=0)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_email', 'type', 'category'], name='transaction_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_email} {self.type} {self.category}'
+
+
+class TransactionVersion(models.Model):
+    """
+    Number of writes to the transactions of each user, which keys the cached summaries and their ETags.
+
+    Kept up to date by database triggers on the transactions table (see migration 0009), so every write
+    bumps it, whatever the process or the SQL that made it. Rows are never deleted, so a version never
+    goes back to a previous value.
+    """
+    user_email = models.EmailField(max_length=255, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_email} {self.version}'
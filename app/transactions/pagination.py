@@ -0,0 +1,97 @@
+"""
+Pagination for transactions API.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the transactions ordered by `(date, reference)`.
+
+    The cursor holds the date and reference of the last (or first, going backwards) transaction of
+    the page, and the next page is read from the `(date, reference)` index right after it, so deep
+    pages cost the same as the first one. The page size defaults to `TRANSACTIONS_PAGE_SIZE`, and
+    can be changed with the `page_size` query param up to `TRANSACTIONS_MAX_PAGE_SIZE`.
+    """
+    ordering = ('date', 'reference')
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request) -> int:
+        """Read the default and maximum page sizes from the settings at request time."""
+        self.page_size = settings.TRANSACTIONS_PAGE_SIZE
+        self.max_page_size = settings.TRANSACTIONS_MAX_PAGE_SIZE
+        return super(TransactionCursorPagination, self).get_page_size(request)
+
+    def paginate_queryset(self, queryset, request, view=None) -> list:
+        """
+        Return the page of transactions right after (or before, for a reversed cursor) the cursor
+        position, fetching a single extra row to know whether there is a following page.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor.reverse)
+        position = self.decode_position(cursor.position) if cursor and cursor.position else None
+
+        if position:
+            date, reference = position
+            if reverse:
+                queryset = queryset.filter(Q(date__lte=date) & (Q(date__lt=date) | Q(reference__lt=reference)))
+            else:
+                queryset = queryset.filter(Q(date__gte=date) & (Q(date__gt=date) | Q(reference__gt=reference)))
+
+        queryset = queryset.order_by(*(f'-{field}' if reverse else field for field in self.ordering))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        return self.page
+
+    def get_next_link(self) -> str:
+        if not (self.has_next and self.page):
+            return None
+
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.encode_position(self.page[-1])))
+
+    def get_previous_link(self) -> str:
+        if not (self.has_previous and self.page):
+            return None
+
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.encode_position(self.page[0])))
+
+    def encode_position(self, instance) -> str:
+        """Return the cursor position of a transaction, in the format 'YYYY-MM-DD|reference'."""
+        return f'{instance.date.isoformat()}|{instance.reference}'
+
+    def decode_position(self, position: str) -> tuple:
+        """
+        Return the date and reference of a cursor position.
+
+        Raises
+        ------
+        NotFound
+            If the position is not in the format 'YYYY-MM-DD|reference'.
+        """
+        date, separator, reference = position.partition('|')
+        try:
+            date = datetime.date.fromisoformat(date)
+        except ValueError:
+            separator = None
+
+        if not separator:
+            raise NotFound(self.invalid_cursor_message)
+
+        return date, reference
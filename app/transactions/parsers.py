@@ -0,0 +1,100 @@
+"""
+Parsers for transactions API.
+"""
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser backed by orjson, falling back to the stdlib `json` of `JSONParser` when orjson is not
+    installed, or when the body is not UTF-8 encoded.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super(FastJSONParser, self).parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parser for newline delimited JSON, with one transaction per line.
+
+    The body is returned as a lazy iterator of dicts, so lines are only read and decoded while the
+    iterator is consumed, instead of loading the whole payload in memory.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self.iter_rows(stream, encoding)
+
+    def iter_rows(self, stream, encoding: str):
+        """Yield the decoded JSON object of each non empty line of the stream."""
+        if stream is None:
+            return
+
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                yield json.loads(line.decode(encoding))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error on line {number} - {exc}')
+
+
+class CSVParser(BaseParser):
+    """
+    Parser for CSV, with a header row naming the transaction fields and one transaction per row.
+
+    Like `NDJSONParser`, the body is returned as a lazy iterator of dicts, so rows are only read and
+    decoded while the iterator is consumed. Columns other than the transaction fields are ignored.
+    """
+    media_type = 'text/csv'
+    columns = ('reference', 'date', 'amount', 'type', 'category', 'user_email')
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self.iter_rows(stream, encoding)
+
+    def iter_rows(self, stream, encoding: str):
+        """Yield a dict with the transaction fields of each non empty row of the stream."""
+        if stream is None:
+            return
+
+        if codecs.lookup(encoding).name == 'utf-8':
+            # Skips the byte order mark some spreadsheets and bank feeds write before the header.
+            encoding = 'utf-8-sig'
+
+        reader = csv.DictReader(codecs.iterdecode(stream, encoding))
+        try:
+            missing = [column for column in self.columns if column not in (reader.fieldnames or ())]
+            if missing:
+                raise ParseError(f'CSV parse error - missing columns: {", ".join(missing)}')
+
+            for row in reader:
+                yield {column: row[column] for column in self.columns}
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f'CSV parse error on line {reader.line_num} - {exc}')
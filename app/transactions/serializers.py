@@ -1,36 +1,145 @@
 """
 Serializers for transactions API.
 """
-import decimal
-from transactions.models import Transaction
+from transactions.amounts import parse_amount
+from transactions.ingestion import PartialInsertError, chunked, insert_transactions, upsert_transactions
+from transactions.models import ImportJob, Transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
+from django.conf import settings
 from django.db.utils import IntegrityError
 
+ON_ERROR_CHOICES = ('abort', 'skip')
+REFERENCE_EXISTS_MESSAGE = 'transaction with this reference already exists.'
+REFERENCE_REPEATED_MESSAGE = 'Reference is repeated in the payload.'
+
+
+def offset_errors(errors, offset: int):
+    """Shift the row indexes of the errors of a chunk by the chunk offset in the whole payload."""
+    if not isinstance(errors, dict):
+        return errors
+
+    return {offset + index if isinstance(index, int) else index: detail for index, detail in errors.items()}
+
 
 class TransactionBulkCreateSerializer(serializers.ListSerializer):
     """Serializer for multiple transactions creation."""
 
     def create(self, validated_data):
         """
-        Create multiple transactions at once using bulk_create.
+        Create multiple transactions at once using bulk_create, or COPY for large batches.
+
+        When the `on_conflict` context is set, transactions are upserted by reference instead, and
+        `report` holds the number of inserted, skipped and updated transactions. With `on_error=skip`,
+        it also holds the errors of the skipped invalid transactions keyed by their index in the payload.
 
         Raises
         ------
-        IntegrityError
-            If the data has transactions with same reference.
+        ValidationError
+            If the data has transactions with same reference, with the number of transactions already
+            committed when the creation is not atomic.
         """
-        try:
-            data = [Transaction(**item) for item in validated_data]
-            return Transaction.objects.bulk_create(data)
-        except IntegrityError:
-            raise serializers.ValidationError('Reference must be unique.')
+        on_conflict = self.context.get('on_conflict')
+        if on_conflict:
+            instances = validated_data
+            self.report = upsert_transactions(validated_data, on_conflict)
+        else:
+            try:
+                instances = insert_transactions(validated_data)
+            except PartialInsertError as exc:
+                raise serializers.ValidationError(f'Reference must be unique. {exc}')
+            except IntegrityError:
+                raise serializers.ValidationError('Reference must be unique.')
+            self.report = {'created': len(instances)}
+
+        if self.context.get('on_error') == 'skip':
+            self.report['errors'] = self.row_errors
+
+        return instances
+
+    def to_internal_value(self, data):
+        """
+        Validate every transaction of a multiple transaction creation in a single pass.
+
+        With the `on_error=skip` context, invalid transactions are left out and their errors are kept
+        in `row_errors` instead.
+
+        Raises
+        ------
+        ValidationError
+            With the errors of the invalid transactions keyed by their index in the payload.
+        """
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(input_type=type(data).__name__)
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='not_a_list')
+
+        if not self.allow_empty and len(data) == 0:
+            message = self.error_messages['empty']
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='empty')
+
+        rows, self.row_errors = self.validate_rows(data)
+        if self.row_errors and self.context.get('on_error') != 'skip':
+            raise serializers.ValidationError(self.row_errors)
+
+        return rows
+
+    def validate_rows(self, data: list) -> tuple[list, dict]:
+        """
+        Run the field and business rules validation once for each transaction.
+
+        Unless the `on_conflict` context is set, references repeated in the payload are found with a set, and
+        the ones that already exist with a single `reference IN (...)` query per chunk of
+        `TRANSACTIONS_STREAM_CHUNK_SIZE` references, instead of one query per transaction. When the payload
+        is validated in several parts that are inserted together, the `references` context holds the set of
+        references seen in the previous parts, so the ones repeated across parts are found too.
+
+        Parameters
+        ----------
+        data : list
+            The transactions payload.
 
-    def validate(self, data):
-        """Validate each transaction in a multiple transaction creation."""
-        for item in data:
-            self.child.initial_data = item
-            self.child.is_valid(raise_exception=True)
-        return data
+        Returns
+        -------
+        tuple[list, dict]
+            The validated transactions, and the errors of the invalid ones keyed by their index in the payload.
+        """
+        rows = {}
+        errors = {}
+        check_references = not self.context.get('on_conflict')
+        seen = self.context.get('references', set())
+        references = set()
+
+        for index, item in enumerate(data):
+            try:
+                row = self.child.run_validation(item)
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+                continue
+
+            if check_references and row['reference'] in seen:
+                errors[index] = self.reference_error(REFERENCE_REPEATED_MESSAGE)
+                continue
+
+            seen.add(row['reference'])
+            references.add(row['reference'])
+            rows[index] = row
+
+        if check_references and rows:
+            existing = set()
+            for chunk in chunked(references, settings.TRANSACTIONS_STREAM_CHUNK_SIZE):
+                existing.update(Transaction.objects.filter(reference__in=chunk).values_list('reference', flat=True))
+
+            for index, row in list(rows.items()):
+                if row['reference'] in existing:
+                    errors[index] = self.reference_error(REFERENCE_EXISTS_MESSAGE)
+                    del rows[index]
+
+        return list(rows.values()), dict(sorted(errors.items()))
+
+    def reference_error(self, message: str) -> dict:
+        """Return the error detail of a transaction with an invalid reference."""
+        return serializers.ValidationError({'reference': [message]}, code='unique').detail
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -42,9 +151,24 @@ class TransactionSerializer(serializers.ModelSerializer):
         fields = ['user_email', 'reference', 'date', 'amount', 'type', 'category']
         list_serializer_class = TransactionBulkCreateSerializer
 
+    def get_fields(self):
+        """
+        Drop the per transaction reference uniqueness query for multiple transactions creation, where the
+        references are checked for the whole payload at once, or not at all for bulk upserts.
+        """
+        fields = super().get_fields()
+
+        if isinstance(self.parent, serializers.ListSerializer):
+            reference = fields['reference']
+            reference.validators = [
+                validator for validator in reference.validators if not isinstance(validator, UniqueValidator)
+            ]
+
+        return fields
+
     def validate_amount(self, value: str) -> int:
         """
-        Check if the amount is a valid decimal and complies with business rules.
+        Check if the amount is a valid decimal with at most two decimal places.
 
         Parameters
         ----------
@@ -59,22 +183,34 @@ class TransactionSerializer(serializers.ModelSerializer):
         Raises
         ------
         ValidationError
-            If the amount is not a valid decimal.
+            If the amount is not a valid decimal, or has more than two decimal places.
         """
         try:
-            amount = self.amount_to_integer(value)
-        except decimal.InvalidOperation:
-            raise serializers.ValidationError('Invalid amount format.')
+            return parse_amount(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
 
-        data = self.get_initial()
-        self.check_amount_according_type(data.get('type'), amount)
+    def validate(self, attrs: dict) -> dict:
+        """
+        Check the amount sign rule on the already parsed amount and type. On partial updates, the
+        missing one is taken from the updated transaction.
 
-        return amount
+        Raises
+        ------
+        ValidationError
+            If the amount sign does not match the transaction type.
+        """
+        type = attrs.get('type', getattr(self.instance, 'type', None))
+        amount = attrs.get('amount', getattr(self.instance, 'amount', None))
+        if type is None or amount is None:
+            return attrs
 
-    def amount_to_integer(self, amount: str) -> int:
-        """Convert an amount string (example: '00.00') into an int with its value in cents."""
-        amount_decimal = decimal.Decimal(amount)
-        return int(amount_decimal * 100)
+        try:
+            self.check_amount_according_type(type, amount)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'amount': exc.detail})
+
+        return attrs
 
     def check_amount_according_type(self, type: str, amount: int):
         """
@@ -113,3 +249,15 @@ class TransactionGroupedByTypeSerializer(serializers.Serializer):
     user_email = serializers.EmailField()
     total_inflow = AmountField(max_digits=10, decimal_places=2)
     total_outflow = AmountField(max_digits=10, decimal_places=2)
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for the status of transaction import jobs."""
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'status', 'on_conflict', 'on_error', 'total_rows', 'processed_rows', 'attempts', 'report',
+            'errors', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,36 @@
+"""
+Test for the amounts parsing.
+"""
+
+from django.test import SimpleTestCase
+
+from transactions.amounts import parse_amount
+
+
+class ParseAmountTests(SimpleTestCase):
+    """Test the conversion of amount strings into cents."""
+
+    def test_parse_amounts_with_two_decimal_places(self):
+        """Tests the conversion of the amounts handled without Decimal"""
+        self.assertEqual(parse_amount('-51.13'), -5113)
+        self.assertEqual(parse_amount('+2500.72'), 250072)
+        self.assertEqual(parse_amount('-0.01'), -1)
+        self.assertEqual(parse_amount('-.99'), -99)
+
+    def test_parse_amounts_in_other_formats(self):
+        """Tests the conversion of the amounts handled with Decimal"""
+        self.assertEqual(parse_amount('51'), 5100)
+        self.assertEqual(parse_amount('51.1'), 5110)
+        self.assertEqual(parse_amount('5.'), 500)
+        self.assertEqual(parse_amount('1e2'), 10000)
+
+    def test_parse_amounts_with_more_than_two_decimal_places_should_fail(self):
+        """Tests that amounts are never truncated"""
+        for value in ['10.125', '5.100', '1e-3']:
+            with self.assertRaisesMessage(ValueError, 'Amount should have at most two decimal places.'):
+                parse_amount(value)
+
+    def test_parse_invalid_amounts_should_fail(self):
+        for value in ['', '-', '.', 'a.13', '1.-2', '5 .13', 'NaN', 'Infinity']:
+            with self.assertRaisesMessage(ValueError, 'Invalid amount format.'):
+                parse_amount(value)
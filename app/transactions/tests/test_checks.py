@@ -0,0 +1,20 @@
+"""
+Test for system checks.
+"""
+from django.test import SimpleTestCase, override_settings
+
+from transactions.checks import check_summaries_cache_is_shared
+
+
+class SummariesCacheCheckTests(SimpleTestCase):
+    """Test the check of the summaries cache backend."""
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local_memory_cache_is_reported(self):
+        errors = check_summaries_cache_is_shared(None)
+
+        self.assertEqual([error.id for error in errors], ['transactions.W001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_shared_cache_is_not_reported(self):
+        self.assertEqual(check_summaries_cache_is_shared(None), [])
@@ -0,0 +1,188 @@
+import datetime
+import io
+from unittest import mock
+
+from transactions.imports import LeaseLost, claim_job, process_job
+from transactions.models import ImportJob, Transaction
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+IMPORT_URL = reverse('transaction:import-list')
+
+
+def detail_url(job_id):
+    return reverse('transaction:import-detail', kwargs={'pk': job_id})
+
+
+@override_settings(TRANSACTIONS_STREAM_CHUNK_SIZE=2)
+class ImportAPITests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.payload = [
+            {
+                'reference': reference,
+                'date': '2020-01-03',
+                'amount': '-51.13',
+                'type': 'outflow',
+                'category': 'groceries',
+                'user_email': 'janedoe@email.com'
+            }
+            for reference in ['000001', '000002', '000003']
+        ]
+
+    def process_imports(self):
+        call_command('process_imports', once=True, stdout=io.StringIO())
+
+    def test_create_import_returns_202_and_queues_the_job(self):
+        res = self.client.post(IMPORT_URL, self.payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['status'], 'pending')
+        self.assertEqual(res.data['total_rows'], 3)
+        self.assertEqual(res['Location'], detail_url(res.data['id']))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_process_import_creates_the_transactions(self):
+        job_id = self.client.post(IMPORT_URL, self.payload, format='json').data['id']
+
+        self.process_imports()
+
+        res = self.client.get(detail_url(job_id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], 'succeeded')
+        self.assertEqual(res.data['processed_rows'], 3)
+        self.assertEqual(res.data['report'], {'created': 3})
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_process_import_with_invalid_transaction_fails_the_job(self):
+        self.payload[2]['amount'] = '51.13'
+        job_id = self.client.post(IMPORT_URL, self.payload, format='json').data['id']
+
+        self.process_imports()
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.processed_rows, 2)
+        self.assertEqual(list(job.errors), ['2'])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_process_import_skipping_invalid_transactions(self):
+        self.payload[0]['amount'] = '51.13'
+        job_id = self.client.post(IMPORT_URL + '?on_error=skip', self.payload, format='json').data['id']
+
+        self.process_imports()
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.report, {'created': 2})
+        self.assertEqual(list(job.errors), ['0'])
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_process_import_with_duplicated_reference_fails_the_job(self):
+        self.payload[1]['reference'] = '000001'
+        job_id = self.client.post(IMPORT_URL, self.payload, format='json').data['id']
+
+        self.process_imports()
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.errors, {'1': {'reference': ['Reference is repeated in the payload.']}})
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_process_import_skipping_a_reference_repeated_in_another_chunk(self):
+        self.payload.append(dict(self.payload[0]))
+        job_id = self.client.post(IMPORT_URL + '?on_error=skip', self.payload, format='json').data['id']
+
+        self.process_imports()
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.report, {'created': 3})
+        self.assertEqual(job.errors, {'3': {'reference': ['Reference is repeated in the payload.']}})
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_process_import_with_a_reference_repeated_in_another_chunk_fails_the_job(self):
+        self.payload.append(dict(self.payload[0]))
+        job_id = self.client.post(IMPORT_URL, self.payload, format='json').data['id']
+
+        self.process_imports()
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.errors, {'3': {'reference': ['Reference is repeated in the payload.']}})
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_create_import_with_invalid_payload_should_return_400(self):
+        res = self.client.post(IMPORT_URL, self.payload[0], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ImportJob.objects.exists())
+
+    def create_running_job(self, heartbeat_seconds_ago: int, attempts: int = 1):
+        job_id = self.client.post(IMPORT_URL, self.payload, format='json').data['id']
+        heartbeat_at = timezone.now() - datetime.timedelta(seconds=heartbeat_seconds_ago)
+        ImportJob.objects.filter(pk=job_id).update(status='running', attempts=attempts, heartbeat_at=heartbeat_at)
+        return job_id
+
+    @override_settings(TRANSACTIONS_IMPORT_LEASE_SECONDS=60)
+    def test_process_import_claims_again_a_running_job_with_an_expired_lease(self):
+        job_id = self.create_running_job(heartbeat_seconds_ago=120)
+
+        self.process_imports()
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    @override_settings(TRANSACTIONS_IMPORT_LEASE_SECONDS=60)
+    def test_process_import_leaves_a_running_job_with_a_live_lease(self):
+        job_id = self.create_running_job(heartbeat_seconds_ago=10)
+
+        self.process_imports()
+
+        self.assertEqual(ImportJob.objects.get(pk=job_id).status, 'running')
+        self.assertFalse(Transaction.objects.exists())
+
+    @override_settings(TRANSACTIONS_IMPORT_LEASE_SECONDS=60, TRANSACTIONS_IMPORT_MAX_ATTEMPTS=3)
+    def test_process_import_fails_a_job_abandoned_too_many_times(self):
+        job_id = self.create_running_job(heartbeat_seconds_ago=120, attempts=3)
+
+        self.process_imports()
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.errors, {'non_field_errors': ['The job was abandoned by its worker 3 times.']})
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_process_import_stops_when_the_job_was_claimed_again(self):
+        self.client.post(IMPORT_URL, self.payload, format='json')
+        job = claim_job()
+        ImportJob.objects.filter(pk=job.pk).update(attempts=job.attempts + 1)
+
+        with self.assertRaises(LeaseLost):
+            process_job(job)
+
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).status, 'running')
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_process_imports_keeps_polling_when_the_database_is_unavailable(self):
+        stderr = io.StringIO()
+        command = 'transactions.management.commands.process_imports'
+
+        # The second poll finds no jobs, and the worker is stopped while waiting for the next one
+        with mock.patch(f'{command}.claim_job', side_effect=[OperationalError('connection lost'), None]), \
+                mock.patch(f'{command}.time.sleep', side_effect=[None, KeyboardInterrupt]), \
+                mock.patch(f'{command}.connection') as connection:
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('process_imports', stderr=stderr, stdout=io.StringIO())
+
+        self.assertIn('Could not claim an import job: connection lost', stderr.getvalue())
+        connection.close.assert_called_once_with()
@@ -2,10 +2,15 @@
 Test for models.
 """
 
+import threading
 from datetime import datetime
-from django.test import TestCase
+from unittest import mock
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from psycopg2 import errorcodes
 
 from transactions import models
+from transactions.ingestion import bulk_create_transactions, insert_values
 
 
 class ModelTests(TestCase):
@@ -22,3 +27,199 @@ class ModelTests(TestCase):
             category='groceries'
         )
         self.assertEqual(str(transaction), transaction.reference)
+
+
+class TransactionRollupTests(TestCase):
+    """Test the rollup table kept by the transactions triggers."""
+
+    def create_transaction(self, reference, amount, type='outflow', category='groceries'):
+        return models.Transaction.objects.create(
+            user_email='janedoe@email.com',
+            reference=reference,
+            date=datetime.strptime('2020-01-13', '%Y-%m-%d').date(),
+            amount=amount,
+            type=type,
+            category=category
+        )
+
+    def rollup(self):
+        return {
+            (item.type, item.category): (item.total_amount, item.count)
+            for item in models.TransactionRollup.objects.filter(user_email='janedoe@email.com')
+        }
+
+    def test_rollup_is_updated_on_inserts(self):
+        self.create_transaction('000001', -5113)
+        self.create_transaction('000002', -1000)
+        self.create_transaction('000003', 250072, type='inflow', category='salary')
+
+        self.assertEqual(self.rollup(), {
+            ('outflow', 'groceries'): (-6113, 2),
+            ('inflow', 'salary'): (250072, 1),
+        })
+
+    def test_rollup_is_updated_on_bulk_inserts(self):
+        models.Transaction.objects.bulk_create([
+            models.Transaction(
+                user_email='janedoe@email.com', reference=reference, date='2020-01-13', amount=-100,
+                type='outflow', category='groceries'
+            )
+            for reference in ['000001', '000002', '000003']
+        ])
+
+        self.assertEqual(self.rollup(), {('outflow', 'groceries'): (-300, 3)})
+
+    def test_rollup_is_updated_on_updates(self):
+        transaction = self.create_transaction('000001', -5113)
+        self.create_transaction('000002', -1000)
+
+        transaction.category = 'rent'
+        transaction.amount = -56000
+        transaction.save()
+
+        self.assertEqual(self.rollup(), {
+            ('outflow', 'groceries'): (-1000, 1),
+            ('outflow', 'rent'): (-56000, 1),
+        })
+
+    def test_rollup_is_updated_on_deletes(self):
+        self.create_transaction('000001', -5113)
+        self.create_transaction('000002', -1000, category='rent')
+
+        models.Transaction.objects.filter(reference='000002').delete()
+
+        self.assertEqual(self.rollup(), {('outflow', 'groceries'): (-5113, 1)})
+
+
+class TransactionVersionTests(TestCase):
+    """Test the versions of the transactions of each user kept by the transactions triggers."""
+
+    def versions(self):
+        return dict(models.TransactionVersion.objects.values_list('user_email', 'version'))
+
+    def test_versions_are_bumped_once_per_statement_of_each_user(self):
+        transaction = models.Transaction.objects.create(
+            user_email='janedoe@email.com', reference='000001', date='2020-01-13', amount=-5113,
+            type='outflow', category='groceries'
+        )
+        models.Transaction.objects.bulk_create([
+            models.Transaction(
+                user_email='janedoe@email.com', reference=reference, date='2020-01-13', amount=-100,
+                type='outflow', category='groceries'
+            )
+            for reference in ['000002', '000003']
+        ])
+        self.assertEqual(self.versions(), {'janedoe@email.com': 2})
+
+        transaction.user_email = 'johndoe@email.com'
+        transaction.save()
+        self.assertEqual(self.versions(), {'janedoe@email.com': 3, 'johndoe@email.com': 1})
+
+        models.Transaction.objects.all().delete()
+        self.assertEqual(self.versions(), {'janedoe@email.com': 4, 'johndoe@email.com': 2})
+
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE transactions_transaction')
+        self.assertEqual(self.versions(), {'janedoe@email.com': 5, 'johndoe@email.com': 3})
+
+
+class TransactionRollupLockTests(TransactionTestCase):
+    """Test the locks taken on the rollup rows by concurrent writes."""
+
+    def create_transactions(self, name, user_emails, barrier, errors):
+        try:
+            with transaction.atomic():
+                for index, user_email in enumerate(user_emails):
+                    models.Transaction.objects.create(
+                        user_email=user_email,
+                        reference=f'{name}{index}',
+                        date='2020-01-13',
+                        amount=-100,
+                        type='outflow',
+                        category='groceries'
+                    )
+                    if index == 0:
+                        barrier.wait(timeout=10)
+        except OperationalError as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def insert_transactions(self, name, user_emails, barrier, errors):
+        rows = [
+            {
+                'reference': f'{name}{index}',
+                'user_email': user_email,
+                'date': '2020-01-13',
+                'amount': -100,
+                'type': 'outflow',
+                'category': 'groceries',
+            }
+            for index, user_email in enumerate(user_emails)
+        ]
+        chunks = []
+
+        def insert_chunk_and_wait(chunk):
+            insert_values(chunk)
+            chunks.append(chunk)
+            if len(chunks) == 1:
+                # The other insertion may be waiting for the rows locked by this one instead
+                try:
+                    barrier.wait(timeout=2)
+                except threading.BrokenBarrierError:
+                    pass
+
+        try:
+            with mock.patch('transactions.ingestion.insert_values', side_effect=insert_chunk_and_wait):
+                bulk_create_transactions(rows)
+        except OperationalError as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    @override_settings(
+        TRANSACTIONS_BULK_CREATE_BATCH_SIZE=1,
+        TRANSACTIONS_BULK_CREATE_ATOMIC=True,
+        TRANSACTIONS_BULK_CREATE_BACKEND='execute_values',
+    )
+    def test_chunked_insertions_of_the_same_users_in_opposite_order_do_not_deadlock(self):
+        errors = self.run_concurrently(self.insert_transactions)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            sorted(models.TransactionRollup.objects.values_list('user_email', 'count')),
+            [('janedoe@email.com', 2), ('johndoe@email.com', 2)]
+        )
+
+    def test_multi_statement_writes_locking_rollup_rows_in_opposite_order_deadlock(self):
+        """
+        Each statement locks its rollup rows in key order, but a transaction with several statements
+        keeps the locks of the previous ones, so one of two such transactions is rolled back.
+        """
+        errors = self.run_concurrently(self.create_transactions)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].__cause__.pgcode, errorcodes.DEADLOCK_DETECTED)
+        self.assertEqual(models.Transaction.objects.count(), 2)
+        self.assertEqual(
+            sorted(models.TransactionRollup.objects.values_list('user_email', 'count')),
+            [('janedoe@email.com', 1), ('johndoe@email.com', 1)]
+        )
+
+    def run_concurrently(self, write):
+        """Run two writes of the same users in opposite order in two threads, and return their errors."""
+        barrier = threading.Barrier(2)
+        errors = []
+        threads = [
+            threading.Thread(target=write, args=(name, user_emails, barrier, errors))
+            for name, user_emails in [
+                ('a', ['janedoe@email.com', 'johndoe@email.com']),
+                ('b', ['johndoe@email.com', 'janedoe@email.com']),
+            ]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return errors
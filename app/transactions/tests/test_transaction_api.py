@@ -1,10 +1,20 @@
+import io
+import json
 import signal
+from unittest import mock
 
-from transactions.models import Transaction
+from transactions.exports import pyarrow
+from transactions.ingestion import copy_transactions, insert_transactions
+from transactions.models import Transaction, TransactionRollup
+from transactions.serializers import TransactionSerializer
 
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import override_settings
 from django.urls import reverse
+from psycopg2 import errorcodes
 
 from transactions.tests.factories.transaction_factory import TransactionsFactory
 from transactions.tests.fixtures.transaction_payload import test_payload
@@ -21,6 +31,7 @@ class TransactionAPITests(APITestCase):
 
     def setUp(self):
         super().setUp()
+        cache.clear()
         self.basic_payload = {
             'reference': '000001',
             'date': '2020-01-03',
@@ -68,7 +79,24 @@ class TransactionAPITests(APITestCase):
 
         res = self.client.post(TRANSACTION_URL, payload, format='json')
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertEqual(res.data['amount'][0], 'Amount should be a positive decimal for an inflow transaction.')
+        self.assertEqual(res.data[0]['amount'][0], 'Amount should be a positive decimal for an inflow transaction.')
+        self.assertEqual(res.data[1]['amount'][0], 'Amount should be a positive decimal for an inflow transaction.')
+
+    def test_create_multiple_transactions_errors_are_keyed_by_row_index(self):
+        another_transaction = dict(self.basic_payload)
+        another_transaction['reference'] = '000002'
+        another_transaction['amount'] = '-a.13'
+
+        payload = [
+            self.basic_payload,
+            another_transaction
+        ]
+
+        res = self.client.post(TRANSACTION_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), [1])
+        self.assertEqual(res.data[1]['amount'][0], 'Invalid amount format.')
+        self.assertFalse(Transaction.objects.exists())
 
     def test_create_multiple_valid_transactions_successfully(self):
         another_transaction = dict(self.basic_payload)
@@ -86,6 +114,330 @@ class TransactionAPITests(APITestCase):
         self.assertEqual(len(transactions), len(payload))
         self.assertNumQueries(1)
 
+    @override_settings(TRANSACTIONS_BULK_CREATE_BATCH_SIZE=2, TRANSACTIONS_BULK_CREATE_ATOMIC=False)
+    def test_create_multiple_transactions_in_chunks_successfully(self):
+        payload = [dict(self.basic_payload, reference=reference) for reference in ['000001', '000002', '000003']]
+
+        res = self.client.post(TRANSACTION_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['reference'] for item in res.data], ['000001', '000002', '000003'])
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_create_multiple_transactions_rolled_back_by_a_deadlock_should_return_409(self):
+        payload = [dict(self.basic_payload, reference=reference) for reference in ['000001', '000002']]
+        deadlock = OperationalError('deadlock detected')
+        deadlock.__cause__ = type('DeadlockDetected', (Exception,), {'pgcode': errorcodes.DEADLOCK_DETECTED})()
+
+        with mock.patch('transactions.serializers.insert_transactions', side_effect=deadlock):
+            res = self.client.post(TRANSACTION_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['detail'].code, 'write_conflict')
+
+    @override_settings(TRANSACTIONS_BULK_CREATE_BATCH_SIZE=1)
+    def test_create_multiple_transactions_in_chunks_keeps_the_payload_order(self):
+        payload = [
+            dict(self.basic_payload, reference='000001', user_email='johndoe@email.com'),
+            dict(self.basic_payload, reference='000002', user_email='janedoe@email.com'),
+            dict(self.basic_payload, reference='000003', user_email='johndoe@email.com', category='rent'),
+        ]
+
+        res = self.client.post(TRANSACTION_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['reference'] for item in res.data], ['000001', '000002', '000003'])
+
+    @override_settings(TRANSACTIONS_BULK_CREATE_BATCH_SIZE=2, TRANSACTIONS_BULK_CREATE_BACKEND='execute_values')
+    def test_create_multiple_transactions_with_execute_values_successfully(self):
+        payload = [dict(self.basic_payload, reference=reference) for reference in ['000001', '000002', '000003']]
+
+        res = self.client.post(TRANSACTION_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data[0], dict(self.basic_payload, amount='-5113'))
+        transaction = Transaction.objects.get(reference='000003')
+        self.assertEqual(transaction.amount, -5113)
+        self.assertEqual(transaction.date.strftime('%Y-%m-%d'), self.basic_payload['date'])
+
+    @override_settings(TRANSACTIONS_COPY_THRESHOLD=2)
+    def test_create_multiple_transactions_with_copy_successfully(self):
+        another_transaction = dict(self.basic_payload)
+        another_transaction['reference'] = '000002'
+        another_transaction['category'] = 'rent, "downtown"'
+
+        payload = [
+            self.basic_payload,
+            another_transaction
+        ]
+
+        res = self.client.post(TRANSACTION_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['reference'] for item in res.data], ['000001', '000002'])
+
+        transaction = Transaction.objects.get(reference='000002')
+        self.assertEqual(transaction.amount, -5113)
+        self.assertEqual(transaction.category, 'rent, "downtown"')
+        self.assertEqual(transaction.date.strftime('%Y-%m-%d'), self.basic_payload['date'])
+
+    @override_settings(TRANSACTIONS_COPY_THRESHOLD=2)
+    def test_create_multiple_transactions_with_copy_and_duplicated_reference_should_return_400(self):
+        payload = [
+            self.basic_payload,
+            dict(self.basic_payload)
+        ]
+
+        res = self.client.post(TRANSACTION_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), [1])
+        self.assertEqual(res.data[1]['reference'][0], 'Reference is repeated in the payload.')
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_create_multiple_transactions_with_existing_reference_should_return_400(self):
+        self.factory.create(reference='000002')
+        payload = [
+            self.basic_payload,
+            dict(self.basic_payload, reference='000002'),
+        ]
+
+        res = self.client.post(TRANSACTION_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), [1])
+        self.assertEqual(res.data[1]['reference'][0], 'transaction with this reference already exists.')
+        self.assertFalse(Transaction.objects.filter(reference='000001').exists())
+
+    def test_create_multiple_transactions_checks_references_in_a_single_query(self):
+        payload = [dict(self.basic_payload, reference=f'{index:06}') for index in range(10)]
+
+        with self.assertNumQueries(1):
+            serializer = TransactionSerializer(data=payload, many=True)
+            self.assertTrue(serializer.is_valid())
+
+    @override_settings(TRANSACTIONS_STREAM_CHUNK_SIZE=2)
+    def test_create_ndjson_transactions_in_chunks_successfully(self):
+        payload = []
+        for reference in ['000001', '000002', '000003']:
+            payload.append(dict(self.basic_payload, reference=reference))
+        body = '\n'.join(json.dumps(item) for item in payload) + '\n'
+
+        res = self.client.post(TRANSACTION_URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'created': 3})
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    @override_settings(TRANSACTIONS_STREAM_CHUNK_SIZE=2)
+    def test_create_ndjson_transactions_with_invalid_row_should_return_400(self):
+        payload = []
+        for reference in ['000001', '000002', '000003']:
+            payload.append(dict(self.basic_payload, reference=reference))
+        payload[2]['amount'] = '51.13'
+        body = '\n'.join(json.dumps(item) for item in payload)
+
+        res = self.client.post(TRANSACTION_URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[2]['amount'][0], 'Amount should be a negative decimal for an outflow transaction.')
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_create_ndjson_transactions_with_malformed_line_should_return_400(self):
+        body = json.dumps(self.basic_payload) + '\n{"reference": '
+
+        res = self.client.post(TRANSACTION_URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 2', res.data['detail'])
+        self.assertFalse(Transaction.objects.exists())
+
+    @override_settings(TRANSACTIONS_STREAM_CHUNK_SIZE=2)
+    def test_create_csv_transactions_in_chunks_successfully(self):
+        body = (
+            'user_email,reference,date,amount,type,category,bank\n'
+            'janedoe@email.com,000001,2020-01-03,-51.13,outflow,groceries,belvo\n'
+            'janedoe@email.com,000002,2020-01-03,-51.13,outflow,"rent, downtown",belvo\n'
+            '\n'
+            'janedoe@email.com,000003,2020-01-04,2500.72,inflow,salary,belvo\n'
+        )
+
+        res = self.client.post(TRANSACTION_URL, body, content_type='text/csv')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'created': 3})
+        self.assertEqual(Transaction.objects.get(reference='000002').category, 'rent, downtown')
+        self.assertEqual(Transaction.objects.get(reference='000003').amount, 250072)
+
+    def test_create_csv_transactions_with_byte_order_mark_successfully(self):
+        body = (
+            '\ufeffreference,date,amount,type,category,user_email\n'
+            '000001,2020-01-03,-51.13,outflow,groceries,janedoe@email.com\n'
+        ).encode('utf-8')
+
+        res = self.client.post(TRANSACTION_URL, body, content_type='text/csv')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'created': 1})
+        self.assertTrue(Transaction.objects.filter(reference='000001').exists())
+
+    def test_create_csv_transactions_with_missing_columns_should_return_400(self):
+        body = 'reference,date,amount\n000001,2020-01-03,-51.13\n'
+
+        res = self.client.post(TRANSACTION_URL, body, content_type='text/csv')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('type, category, user_email', res.data['detail'])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_create_multiple_transactions_with_summary_response(self):
+        payload = [dict(self.basic_payload, reference=reference) for reference in ['000002', '000003', '000001']]
+
+        res = self.client.post(TRANSACTION_URL + '?response=summary', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'created': 3, 'first_reference': '000001', 'last_reference': '000003'})
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_create_multiple_transactions_preferring_minimal_response(self):
+        payload = [
+            dict(self.basic_payload, reference='000001'),
+            dict(self.basic_payload, reference='000002', amount='51.13'),
+        ]
+
+        res = self.client.post(
+            TRANSACTION_URL + '?on_error=skip', payload, format='json', HTTP_PREFER='respond-async, return=minimal'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual((res.data['first_reference'], res.data['last_reference']), ('000001', '000001'))
+        self.assertEqual(list(res.data['errors']), [1])
+
+    def test_create_multiple_transactions_ignoring_conflicts(self):
+        self.factory.create(reference='000001', amount=100, type='inflow')
+        another_transaction = dict(self.basic_payload, reference='000002')
+
+        payload = [
+            self.basic_payload,
+            another_transaction,
+            dict(another_transaction)
+        ]
+
+        res = self.client.post(TRANSACTION_URL + '?on_conflict=ignore', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'inserted': 1, 'skipped': 2, 'updated': 0})
+        self.assertEqual(Transaction.objects.get(reference='000001').amount, 100)
+        self.assertEqual(Transaction.objects.get(reference='000002').amount, -5113)
+
+    def test_create_multiple_transactions_updating_conflicts(self):
+        self.factory.create(reference='000001', amount=100, type='inflow')
+        self.factory.create(
+            reference='000003',
+            date='2020-01-03',
+            amount=-5113,
+            type='outflow',
+            category='groceries',
+            user_email='janedoe@email.com'
+        )
+
+        payload = [
+            self.basic_payload,
+            dict(self.basic_payload, reference='000002', amount='-1.00'),
+            dict(self.basic_payload, reference='000002', amount='-2.00'),
+            dict(self.basic_payload, reference='000003'),
+        ]
+
+        res = self.client.post(TRANSACTION_URL + '?on_conflict=update', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'inserted': 1, 'skipped': 2, 'updated': 1})
+        updated = Transaction.objects.get(reference='000001')
+        self.assertEqual(updated.amount, -5113)
+        self.assertEqual(updated.type, 'outflow')
+        self.assertEqual(Transaction.objects.get(reference='000002').amount, -200)
+
+        rollup = TransactionRollup.objects.get(user_email='janedoe@email.com', type='outflow', category='groceries')
+        self.assertEqual((rollup.total_amount, rollup.count), (-5113 - 200 - 5113, 3))
+
+    def test_create_multiple_transactions_with_invalid_on_conflict_should_return_400(self):
+        res = self.client.post(TRANSACTION_URL + '?on_conflict=replace', [self.basic_payload], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('on_conflict', res.data)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_create_multiple_transactions_skipping_invalid_ones(self):
+        payload = [
+            dict(self.basic_payload, reference='000001', amount='51.13'),
+            dict(self.basic_payload, reference='000002'),
+            dict(self.basic_payload, reference='000003', amount='-a.13'),
+        ]
+
+        res = self.client.post(TRANSACTION_URL + '?on_error=skip', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(list(res.data['errors']), [0, 2])
+        self.assertEqual(res.data['errors'][2]['amount'][0], 'Invalid amount format.')
+        self.assertEqual(list(Transaction.objects.values_list('reference', flat=True)), ['000002'])
+
+    def test_create_multiple_transactions_skipping_repeated_references(self):
+        payload = [
+            self.basic_payload,
+            dict(self.basic_payload, amount='-1.00'),
+            dict(self.basic_payload, reference='000002'),
+        ]
+
+        res = self.client.post(TRANSACTION_URL + '?on_error=skip', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['errors'][1]['reference'][0], 'Reference is repeated in the payload.')
+        self.assertEqual(Transaction.objects.get(reference='000001').amount, -5113)
+
+    def test_create_multiple_transactions_skipping_invalid_ones_when_all_are_invalid_should_return_400(self):
+        payload = [dict(self.basic_payload, amount='51.13')]
+
+        res = self.client.post(TRANSACTION_URL + '?on_error=skip', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['created'], 0)
+        self.assertEqual(list(res.data['errors']), [0])
+
+    @override_settings(TRANSACTIONS_STREAM_CHUNK_SIZE=2)
+    def test_create_ndjson_transactions_skipping_invalid_ones(self):
+        payload = []
+        for reference in ['000001', '000002', '000003']:
+            payload.append(dict(self.basic_payload, reference=reference))
+        payload[2]['amount'] = '51.13'
+        body = '\n'.join(json.dumps(item) for item in payload)
+
+        res = self.client.post(TRANSACTION_URL + '?on_error=skip', body, content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(list(res.data['errors']), [2])
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_create_transaction_with_malformed_json_should_return_400(self):
+        res = self.client.post(TRANSACTION_URL, '{"reference": ', content_type='application/json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('JSON parse error', res.data['detail'])
+
+    def test_partial_update_transaction_type_checks_the_existing_amount(self):
+        self.factory.create(reference='000001', amount=-5113, type='outflow')
+        url = reverse('transaction:transaction-detail', kwargs={'pk': '000001'})
+
+        res = self.client.patch(url, {'type': 'inflow'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['amount'][0], 'Amount should be a positive decimal for an inflow transaction.')
+
+        res = self.client.patch(url, {'category': 'rent'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Transaction.objects.get(reference='000001').category, 'rent')
+
     def test_invalid_amount_should_return_400(self):
         self.basic_payload['amount'] = '-a.13'
 
@@ -94,6 +446,14 @@ class TransactionAPITests(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(res.data['amount'][0], 'Invalid amount format.')
 
+    def test_amount_with_more_than_two_decimal_places_should_return_400(self):
+        self.basic_payload['amount'] = '-10.125'
+
+        res = self.client.post(TRANSACTION_URL, self.basic_payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['amount'][0], 'Amount should have at most two decimal places.')
+
     def test_negative_amount_with_inflow_type_should_return_400(self):
         self.basic_payload['type'] = 'inflow'
         self.basic_payload['amount'] = '-51.13'
@@ -133,6 +493,116 @@ class TransactionAPITests(APITestCase):
 
         self.assertEqual(res.status_code, status.HTTP_501_NOT_IMPLEMENTED)
 
+    def test_list_transactions_paginated_by_date_and_reference(self):
+        for reference, date in [('000003', '2020-01-01'), ('000001', '2020-01-02'), ('000002', '2020-01-02')]:
+            self.factory.create(reference=reference, date=date)
+
+        res = self.client.get(TRANSACTION_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['reference'] for item in res.data['results']], ['000003', '000001'])
+        self.assertIsNone(res.data['previous'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['reference'] for item in res.data['results']], ['000002'])
+        self.assertIsNone(res.data['next'])
+
+        res = self.client.get(res.data['previous'])
+
+        self.assertEqual([item['reference'] for item in res.data['results']], ['000003', '000001'])
+        self.assertIsNone(res.data['previous'])
+
+    @override_settings(TRANSACTIONS_PAGE_SIZE=1, TRANSACTIONS_MAX_PAGE_SIZE=2)
+    def test_list_transactions_page_size_is_limited_by_the_settings(self):
+        for reference in ['000001', '000002', '000003']:
+            self.factory.create(reference=reference)
+
+        res = self.client.get(TRANSACTION_URL)
+        self.assertEqual(len(res.data['results']), 1)
+
+        res = self.client.get(TRANSACTION_URL, {'page_size': 3})
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_list_transactions_with_invalid_cursor_should_return_404(self):
+        res = self.client.get(TRANSACTION_URL, {'cursor': 'invalid'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(TRANSACTIONS_EXPORT_CHUNK_SIZE=2)
+    def test_export_transactions_as_a_streamed_json_array(self):
+        for reference, date in [('000003', '2020-01-01'), ('000001', '2020-01-02'), ('000002', '2020-01-02')]:
+            self.factory.create(reference=reference, date=date)
+
+        res = self.client.get(reverse('transaction:transaction-export'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        data = json.loads(b''.join(res.streaming_content))
+        self.assertEqual([item['reference'] for item in data], ['000003', '000001', '000002'])
+        self.assertEqual(data[0]['date'], '2020-01-01')
+
+    def test_export_transactions_without_transactions_returns_an_empty_array(self):
+        res = self.client.get(reverse('transaction:transaction-export'))
+
+        self.assertEqual(json.loads(b''.join(res.streaming_content)), [])
+
+    @override_settings(TRANSACTIONS_EXPORT_CHUNK_SIZE=2)
+    def test_export_transactions_as_csv_with_filters(self):
+        for reference, date in [('000003', '2020-01-01'), ('000001', '2020-01-02'), ('000002', '2020-01-03')]:
+            self.factory.create(reference=reference, date=date, amount=-5113, user_email='janedoe@email.com')
+        self.factory.create(reference='000004', date='2020-01-02', user_email='johndoe@email.com')
+
+        url = reverse('transaction:transaction-export')
+        res = self.client.get(url, {'output': 'csv', 'user_email': 'janedoe@email.com', 'from': '2020-01-02'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        self.assertEqual(b''.join(res.streaming_content).decode().splitlines(), [
+            'reference,user_email,date,amount,type,category',
+            '000001,janedoe@email.com,2020-01-02,-5113,inflow,groceries',
+            '000002,janedoe@email.com,2020-01-03,-5113,inflow,groceries',
+        ])
+
+    @override_settings(TRANSACTIONS_EXPORT_CHUNK_SIZE=2)
+    def test_export_transactions_as_arrow(self):
+        for reference in ['000001', '000002', '000003']:
+            self.factory.create(reference=reference, date='2020-01-02', amount=100)
+
+        res = self.client.get(reverse('transaction:transaction-export'), {'output': 'arrow'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        table = pyarrow.ipc.open_stream(b''.join(res.streaming_content)).read_all()
+        self.assertEqual(table.column('reference').to_pylist(), ['000001', '000002', '000003'])
+        self.assertEqual(table.column('amount').to_pylist(), [100, 100, 100])
+
+    @override_settings(TRANSACTIONS_EXPORT_CHUNK_SIZE=2)
+    def test_export_transactions_as_parquet(self):
+        for reference, date in [('000002', '2020-01-03'), ('000001', '2020-01-02'), ('000003', '2020-01-04')]:
+            self.factory.create(reference=reference, date=date, amount=-5113)
+
+        res = self.client.get(reverse('transaction:transaction-export'), {'output': 'parquet'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/vnd.apache.parquet')
+        table = pyarrow.parquet.read_table(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertEqual(table.column('reference').to_pylist(), ['000001', '000002', '000003'])
+        self.assertEqual(table.column('amount').to_pylist(), [-5113, -5113, -5113])
+        self.assertEqual(str(table.column('date').to_pylist()[0]), '2020-01-02')
+
+    @mock.patch('transactions.views.pyarrow', None)
+    def test_export_transactions_as_parquet_without_pyarrow_should_return_406(self):
+        res = self.client.get(reverse('transaction:transaction-export'), {'output': 'parquet'})
+
+        self.assertEqual(res.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+    def test_export_transactions_with_invalid_output_should_return_400(self):
+        res = self.client.get(reverse('transaction:transaction-export'), {'output': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('output', res.data)
+
     def test_list_user_transactions_grouped_by_category_succesfully(self):
         for data in test_payload:
             self.factory.create(**data)
@@ -168,3 +638,203 @@ class TransactionAPITests(APITestCase):
         finally:
             signal.alarm(0)
 
+    def test_list_user_transactions_grouped_by_category_runs_a_single_query_besides_the_version(self):
+        for data in test_payload:
+            self.factory.create(**data)
+
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        with self.assertNumQueries(2):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_user_transactions_grouped_by_category_is_cached_until_the_user_transactions_change(self):
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        self.client.get(url)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url)
+        self.assertEqual(res.data, {'inflow': {}, 'outflow': {}})
+
+        res = self.client.post(
+            TRANSACTION_URL, [dict(self.basic_payload, user_email='johndoe@email.com')], format='json'
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        res = self.client.post(TRANSACTION_URL, [dict(self.basic_payload, reference='000002')], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.get(url)
+        self.assertEqual(res.data, {'inflow': {}, 'outflow': {'groceries': '-51.13'}})
+
+        res = self.client.delete(reverse('transaction:transaction-detail', kwargs={'pk': '000002'}))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        res = self.client.get(url)
+        self.assertEqual(res.data, {'inflow': {}, 'outflow': {}})
+
+        res = self.client.get(reverse('transaction:transaction-cache-stats'))
+        self.assertEqual((res.data['hits'], res.data['misses'], res.data['invalidations']), (2, 3, 3))
+
+    def test_list_user_transactions_grouped_by_category_with_matching_etag_should_return_304(self):
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+        self.client.post(TRANSACTION_URL, self.basic_payload)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertNotEqual(self.client.get(url, {'from': '2020-01-01'})['ETag'], res['ETag'])
+        other_url = reverse('transaction:transaction-summary', kwargs={'user_email': 'johndoe@email.com'})
+        self.assertNotEqual(self.client.get(other_url)['ETag'], res['ETag'])
+
+    def test_list_user_transactions_grouped_by_category_changes_with_writes_outside_the_api(self):
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        etag = self.client.get(url)['ETag']
+
+        # Such as the transactions inserted by the import worker, or with COPY
+        copy_transactions([dict(self.basic_payload, amount=-5113, date='2020-01-03')])
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'inflow': {}, 'outflow': {'groceries': '-51.13'}})
+
+        Transaction.objects.filter(reference='000001').update(user_email='johndoe@email.com')
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'inflow': {}, 'outflow': {}})
+
+    def test_list_user_transactions_grouped_by_category_etag_depends_on_the_response_format(self):
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        etag = self.client.get(url, HTTP_ACCEPT='application/json')['ETag']
+
+        res = self.client.get(url, HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/html; charset=utf-8')
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_transactions_grouped_by_type_with_matching_etag_should_return_304(self):
+        etag = self.client.get(TRANSACTION_URL + '?group_by=type')['ETag']
+
+        res = self.client.get(TRANSACTION_URL + '?group_by=type', HTTP_IF_NONE_MATCH=f'"other", {etag}')
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_transactions_grouped_by_type_is_cached_until_any_transaction_changes(self):
+        self.client.get(TRANSACTION_URL + '?group_by=type')
+
+        with self.assertNumQueries(1):
+            self.client.get(TRANSACTION_URL + '?group_by=type')
+
+        self.client.post(TRANSACTION_URL, self.basic_payload)
+        res = self.client.get(TRANSACTION_URL + '?group_by=type')
+
+        self.assertEqual(res.data, [
+            {'user_email': 'janedoe@email.com', 'total_inflow': None, 'total_outflow': '-51.13'},
+        ])
+
+    def test_list_user_transactions_grouped_by_category_within_a_date_window(self):
+        for data in test_payload:
+            self.factory.create(**data)
+
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        res = self.client.get(url, {'from': '2020-01-04', 'to': '2020-01-10'})
+
+        expected_data = {
+            'inflow': {
+                'salary': '2500.72',
+                'savings': '150.72'
+            },
+            'outflow': {
+                'transfer': '-150.72'
+            }
+        }
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, expected_data)
+
+    def test_list_user_transactions_grouped_by_category_per_week(self):
+        for data in test_payload:
+            self.factory.create(**data)
+
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        res = self.client.get(url, {'bucket': 'week'})
+
+        expected_data = {
+            'bucket': 'week',
+            'buckets': ['2019-12-30', '2020-01-06', '2020-01-13'],
+            'inflow': {
+                'salary': ['0.00', '2500.72', '0.00'],
+                'savings': ['0.00', '150.72', '0.00']
+            },
+            'outflow': {
+                'groceries': ['-51.13', '0.00', '0.00'],
+                'rent': ['0.00', '0.00', '-560.00'],
+                'transfer': ['0.00', '-150.72', '0.00']
+            }
+        }
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, expected_data)
+
+    def test_list_user_transactions_grouped_by_category_per_month_within_a_date_window(self):
+        for data in test_payload:
+            self.factory.create(**data)
+
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        res = self.client.get(url, {'bucket': 'month', 'from': '2020-01-10'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['buckets'], ['2020-01-01'])
+        self.assertEqual(res.data['outflow'], {'rent': ['-560.00'], 'transfer': ['-150.72']})
+
+    def test_list_user_transactions_grouped_by_category_with_invalid_bucket_should_return_400(self):
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        res = self.client.get(url, {'bucket': 'year'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('bucket', res.data)
+
+    def test_list_user_transactions_grouped_by_category_with_invalid_date_should_return_400(self):
+        url = reverse('transaction:transaction-summary', kwargs={'user_email': 'janedoe@email.com'})
+        res = self.client.get(url, {'from': '2020-13-01'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('from', res.data)
+
+
+class TransactionBulkCreateCommitTests(APITransactionTestCase):
+
+    @override_settings(TRANSACTIONS_BULK_CREATE_BATCH_SIZE=2, TRANSACTIONS_BULK_CREATE_ATOMIC=False)
+    def test_create_multiple_transactions_failing_after_committed_chunks_reports_them(self):
+        payload = [
+            {
+                'reference': reference,
+                'date': '2020-01-03',
+                'amount': '-51.13',
+                'type': 'outflow',
+                'category': 'groceries',
+                'user_email': 'janedoe@email.com'
+            }
+            for reference in ['000001', '000002', '000003']
+        ]
+
+        def insert_after_concurrent_creation(rows):
+            TransactionsFactory(reference='000003')
+            return insert_transactions(rows)
+
+        with mock.patch('transactions.serializers.insert_transactions', side_effect=insert_after_concurrent_creation):
+            res = self.client.post(TRANSACTION_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data, ['Reference must be unique. 2 transactions were created before the failing chunk.'])
+        self.assertEqual(Transaction.objects.filter(reference__in=['000001', '000002']).count(), 2)
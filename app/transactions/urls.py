@@ -5,6 +5,7 @@ from transactions import views
 
 
 router = DefaultRouter()
+router.register('transactions/imports', views.ImportJobViewSet, basename='import')
 router.register('transactions', views.TransactionViewSet)
 
 app_name = 'transaction'
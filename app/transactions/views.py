@@ -1,20 +1,102 @@
 """
 Views for transactions API.
 """
+import datetime
+from collections import Counter
+from collections.abc import Iterator
+
+from app.middleware import time_serializer
+from transactions.cache import cached, get_etag, get_stats, get_version
+from transactions.exports import COLUMNAR_OUTPUTS, EXPORT_OUTPUTS, export_transactions, pyarrow
+from transactions.ingestion import ON_CONFLICT_CHOICES, chunked
+from transactions.pagination import TransactionCursorPagination
+from transactions.parsers import CSVParser, NDJSONParser
+from transactions.serializers import ON_ERROR_CHOICES, offset_errors
+from transactions.serializers import ImportJobSerializer
 from transactions.serializers import TransactionGroupedByTypeSerializer
 from transactions.serializers import TransactionSerializer
-from transactions.models import Transaction
-from rest_framework import status, viewsets
+from transactions.models import ImportJob, Transaction, TransactionRollup
+from rest_framework import mixins, status, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotAcceptable, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from django.conf import settings
+from django.db import OperationalError, transaction
 from django.db.models import Sum, Q
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
+from psycopg2 import errorcodes
+
+RESPONSE_CHOICES = ('full', 'summary')
+BUCKETS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+
+class WriteConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The transactions were not written because of a concurrent write, retry the request.'
+    default_code = 'write_conflict'
+
+
+def get_choice_query_param(request, name: str, choices: tuple, default: str = None) -> str:
+    """
+    Return the value of a query param restricted to a set of choices.
+
+    Raises
+    ------
+    ValidationError
+        If the query param is not one of the choices.
+    """
+    value = request.query_params.get(name, default)
+    if value is not None and value not in choices:
+        raise ValidationError({name: [f'Must be one of: {", ".join(choices)}.']})
+
+    return value
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+def get_date_query_param(request, name: str) -> datetime.date:
+    """
+    Return the value of a query param in the YYYY-MM-DD format as a date, or None when it is not informed.
+
+    Raises
+    ------
+    ValidationError
+        If the query param is not a valid date.
+    """
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+
+    if date is None:
+        raise ValidationError({name: ['Date has wrong format. Use the format YYYY-MM-DD.']})
+
+    return date
+
+
+class SerializationTimingMixin:
+    """Time the serialization of the response data in the request metrics."""
+
+    def get_serializer(self, *args, **kwargs):
+        return time_serializer(self.request, super().get_serializer(*args, **kwargs))
+
+
+class TransactionViewSet(SerializationTimingMixin, viewsets.ModelViewSet):
     """View for transactions actions."""
     serializer_class = TransactionSerializer
     queryset = Transaction.objects.all()
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser, CSVParser]
+    pagination_class = TransactionCursorPagination
 
     def get_serializer(self, *args, **kwargs):
         """Set `many` kwargs as True when creating multiple transactions at once"""
@@ -23,30 +105,338 @@ class TransactionViewSet(viewsets.ModelViewSet):
 
         return super(TransactionViewSet, self).get_serializer(*args, **kwargs)
 
+    def get_serializer_context(self):
+        """Add the `on_conflict` and `on_error` query params of bulk creations to the serializer context."""
+        context = super(TransactionViewSet, self).get_serializer_context()
+
+        if self.action == 'create':
+            context['on_conflict'] = get_choice_query_param(self.request, 'on_conflict', ON_CONFLICT_CHOICES)
+            context['on_error'] = get_choice_query_param(self.request, 'on_error', ON_ERROR_CHOICES, default='abort')
+
+        return context
+
+    def handle_exception(self, exc):
+        """
+        Answer with HTTP status code 409 when a write was rolled back to break a deadlock, which can happen
+        when concurrent multi statement writes lock the same rollup rows in a different order.
+        """
+        if isinstance(exc, OperationalError) and getattr(exc.__cause__, 'pgcode', None) == errorcodes.DEADLOCK_DETECTED:
+            exc = WriteConflict()
+
+        return super(TransactionViewSet, self).handle_exception(exc)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='on_conflict',
+                description='Skip or update the transactions whose reference already exists on a bulk creation',
+                required=False,
+                type=str,
+                enum=list(ON_CONFLICT_CHOICES)
+            ),
+            OpenApiParameter(name='on_error',
+                description='Abort the whole bulk creation on invalid transactions, '
+                            'or skip them and create the valid ones',
+                required=False,
+                type=str,
+                enum=list(ON_ERROR_CHOICES)
+            ),
+            OpenApiParameter(name='response',
+                description='Return only the counts, the reference range and the errors of a bulk creation, '
+                            'instead of the created transactions. Same as the `Prefer: return=minimal` header',
+                required=False,
+                type=str,
+                enum=list(RESPONSE_CHOICES)
+            ),
+        ],
+    )
+    def create(self, request, *args, **kwargs):
+        """
+        Create one or multiple transactions. Streamed payloads (application/x-ndjson and text/csv) are created
+        in chunks.
+
+        Returns
+        ----------
+        Response
+            - The created transactions
+            - The number of inserted, skipped and updated transactions for bulk creations with `on_conflict`
+            - The number of created transactions and the errors keyed by row index for bulk creations
+              with `on_error=skip`
+            - The counts, the first and last references and the errors for bulk creations with
+              `response=summary` or the `Prefer: return=minimal` header
+        """
+        if isinstance(request.data, Iterator):
+            return self.stream_create(request.data)
+
+        context = self.get_serializer_context()
+        summary = self.wants_summary_response(request)
+        if isinstance(request.data, list) and (context['on_conflict'] or context['on_error'] == 'skip' or summary):
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+            report = dict(serializer.report)
+            if summary:
+                references = [row['reference'] for row in serializer.validated_data]
+                report['first_reference'] = min(references, default=None)
+                report['last_reference'] = max(references, default=None)
+
+            return self.bulk_response(report, len(request.data))
+
+        return super(TransactionViewSet, self).create(request, *args, **kwargs)
+
+    def wants_summary_response(self, request) -> bool:
+        """Return whether a bulk creation should answer with a summary instead of the created transactions."""
+        response = get_choice_query_param(request, 'response', RESPONSE_CHOICES, default='full')
+        preferences = [preference.strip() for preference in request.headers.get('Prefer', '').split(',')]
+
+        return response == 'summary' or 'return=minimal' in preferences
+
+    def stream_create(self, rows: Iterator):
+        """
+        Validate and insert a streamed payload in chunks of `TRANSACTIONS_STREAM_CHUNK_SIZE` rows
+        while it is still being read. The whole payload is created in a single database transaction.
+
+        Returns
+        ----------
+        Response
+            - HTTP status code 201 with the number of created (or inserted, skipped and updated) transactions,
+              and the errors keyed by row index with `on_error=skip`
+            - HTTP status code 400 with the errors of the first invalid chunk, keyed by row index
+        """
+        report = Counter()
+        errors = {}
+        offset = 0
+
+        with transaction.atomic():
+            for chunk in chunked(rows, settings.TRANSACTIONS_STREAM_CHUNK_SIZE):
+                serializer = self.get_serializer(data=chunk, many=True)
+                if not serializer.is_valid():
+                    raise ValidationError(offset_errors(serializer.errors, offset))
+
+                serializer.save()
+                chunk_report = dict(serializer.report)
+                errors.update(offset_errors(chunk_report.pop('errors', {}), offset))
+                report.update(chunk_report)
+                offset += len(chunk)
+
+        report = dict(report) or {'created': 0}
+        if self.get_serializer_context()['on_error'] == 'skip':
+            report['errors'] = errors
+
+        return self.bulk_response(report, offset)
+
+    def bulk_response(self, report: dict, total: int):
+        """Return the report of a bulk creation, with HTTP status code 400 when every transaction is invalid."""
+        if total and len(report.get('errors', {})) == total:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(report, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='output',
+                description='Export format. Arrow and Parquet need pyarrow, and return 406 without it',
+                required=False,
+                type=str,
+                enum=['json', *EXPORT_OUTPUTS]
+            ),
+            OpenApiParameter(name='user_email',
+                description='Only export transactions made by this user',
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(name='category',
+                description='Only export transactions of this category',
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(name='from',
+                description='Only export transactions made on or after this date',
+                required=False,
+                type=OpenApiTypes.DATE
+            ),
+            OpenApiParameter(name='to',
+                description='Only export transactions made on or before this date',
+                required=False,
+                type=OpenApiTypes.DATE
+            ),
+        ],
+        responses=TransactionSerializer(many=True),
+    )
+    @action(detail=False)
+    def export(self, request):
+        """
+        Stream the transactions, ordered by date and reference, as a single JSON array, an Arrow IPC stream,
+        a Parquet file or a CSV, optionally filtered by user, category and date window.
+
+        The rows are read with a server-side cursor in chunks of `TRANSACTIONS_EXPORT_CHUNK_SIZE` and sent
+        as soon as each chunk is serialized, so the memory used does not grow with the number of transactions.
+        The columnar formats are built from the raw column values, without `TransactionSerializer`.
+
+        Returns
+        ----------
+        StreamingHttpResponse
+            - The export, in the format of the `output` query param
+            - HTTP status code 400 for an unknown output or an invalid date
+            - HTTP status code 406 for the Arrow and Parquet outputs when pyarrow is not installed
+        """
+        output = get_choice_query_param(request, 'output', ('json', *EXPORT_OUTPUTS), default='json')
+        if output in COLUMNAR_OUTPUTS and pyarrow is None:
+            raise NotAcceptable(f'The {output} output needs pyarrow, which is not installed.')
+        date_from = get_date_query_param(request, 'from')
+        date_to = get_date_query_param(request, 'to')
+
+        transactions = self.get_queryset()
+        if 'user_email' in request.query_params:
+            transactions = transactions.filter(user_email=request.query_params['user_email'])
+        if 'category' in request.query_params:
+            transactions = transactions.filter(category=request.query_params['category'])
+        if date_from:
+            transactions = transactions.filter(date__gte=date_from)
+        if date_to:
+            transactions = transactions.filter(date__lte=date_to)
+        transactions = transactions.order_by('date', 'reference')
+
+        if output == 'json':
+            return StreamingHttpResponse(self.iter_json_array(transactions), content_type='application/json')
+
+        content, content_type, extension = export_transactions(transactions, output)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions.{extension}"'
+        return response
+
+    def iter_json_array(self, transactions):
+        """Yield a JSON array with the serialized transactions, one chunk of rows at a time."""
+        serializer = self.get_serializer()
+        encoder = JSONEncoder()
+        chunk_size = settings.TRANSACTIONS_EXPORT_CHUNK_SIZE
+        separator = '['
+
+        for chunk in chunked(transactions.iterator(chunk_size=chunk_size), chunk_size):
+            yield separator + ','.join(encoder.encode(serializer.to_representation(item)) for item in chunk)
+            separator = ','
+
+        yield '[]' if separator == '[' else ']'
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='from',
+                description='Only sum transactions made on or after this date',
+                required=False,
+                type=OpenApiTypes.DATE
+            ),
+            OpenApiParameter(name='to',
+                description='Only sum transactions made on or before this date',
+                required=False,
+                type=OpenApiTypes.DATE
+            ),
+            OpenApiParameter(name='bucket',
+                description='Sum transactions per day, week (starting on Monday) or month, returning a time series '
+                            'per category aligned with the list of bucket start dates',
+                required=False,
+                type=str,
+                enum=list(BUCKETS)
+            ),
+        ],
+    )
     @action(detail=False, url_path=r'(?P<user_email>[^/]+)/summary')
     def summary(self, request, user_email: str = None):
         """
-        List the sum of amounts per transaction category for transactions made by a given user.
+        List the sum of amounts per transaction category for transactions made by a given user,
+        optionally within a date window. Lifetime totals are read from the rollup table. Results are
+        cached until the user transactions change, and answered with 304 for a matching `If-None-Match`.
 
         Parameters
         ----------
         user_email : string
             The user to show the transactions.
         """
-        inflow_summary = Transaction.objects.filter(user_email=user_email, type='inflow').values('category').annotate(
-            total_amount=Sum('amount')
-        )
+        date_from = get_date_query_param(request, 'from')
+        date_to = get_date_query_param(request, 'to')
+        bucket = get_choice_query_param(request, 'bucket', tuple(BUCKETS))
 
-        outflow_summary = Transaction.objects.filter(user_email=user_email, type='outflow').values('category').annotate(
-            total_amount=Sum('amount')
-        )
+        if bucket:
+            return self.cached_response(request, f'summary:{date_from}:{date_to}:{bucket}', user_email,
+                                        lambda: self.get_bucketed_summary(user_email, date_from, date_to, bucket))
+
+        return self.cached_response(request, f'summary:{date_from}:{date_to}', user_email,
+                                    lambda: self.get_summary(user_email, date_from, date_to))
+
+    def cached_response(self, request, key: str, user_email: str, compute):
+        """
+        Return the cached result of a summary along with its ETag, or HTTP status code 304 without computing it
+        when the `If-None-Match` header already has that ETag. Each response format gets its own ETag.
+        """
+        version = get_version(user_email)
+        etag = get_etag(f'{key}:{request.accepted_renderer.format}', user_email, version)
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        return Response(cached(key, user_email, version, compute), headers={'ETag': etag})
+
+    def get_summary(self, user_email: str, date_from: datetime.date, date_to: datetime.date) -> dict:
+        """Return the sum of amounts per type and category of the user transactions, within the date window."""
+        if date_from or date_to:
+            transactions = self.get_user_transactions(user_email, date_from, date_to)
+            totals = transactions.values('type', 'category').annotate(total_amount=Sum('amount'))
+        else:
+            totals = TransactionRollup.objects.filter(user_email=user_email).values('type', 'category', 'total_amount')
+
+        totals = totals.order_by('type', 'category')
+
+        summary = {'inflow': {}, 'outflow': {}}
+        for item in totals:
+            summary[item['type']][item['category']] = '{:.2f}'.format(item['total_amount'] / 100)
+
+        return summary
+
+    def get_bucketed_summary(self, user_email: str, date_from: datetime.date, date_to: datetime.date,
+                             bucket: str) -> dict:
+        """
+        Return the sum of amounts per type, category and day, week or month of the user transactions, within
+        the date window, grouped by `date_trunc` in the database.
+
+        The amounts of each category are listed in the order of `buckets`, the start dates of the periods
+        with any transaction, with '0.00' for the periods without transactions of that category.
+        """
+        totals = self.get_user_transactions(user_email, date_from, date_to).annotate(
+                bucket=BUCKETS[bucket]('date')
+            ).values('bucket', 'type', 'category').annotate(
+                total_amount=Sum('amount')
+            ).order_by('bucket', 'type', 'category')
 
-        summary = {
-            'inflow': {item['category']: '{:.2f}'.format(item['total_amount'] / 100) for item in inflow_summary},
-            'outflow': {item['category']: '{:.2f}'.format(item['total_amount'] / 100) for item in outflow_summary},
-        }
+        buckets = []
+        amounts = {'inflow': {}, 'outflow': {}}
+        for item in totals:
+            if not buckets or buckets[-1] != item['bucket']:
+                buckets.append(item['bucket'])
+            series = amounts[item['type']].setdefault(item['category'], {})
+            series[len(buckets) - 1] = item['total_amount']
 
-        return Response(summary)
+        summary = {'bucket': bucket, 'buckets': [date.isoformat() for date in buckets]}
+        for type, categories in amounts.items():
+            summary[type] = {
+                category: ['{:.2f}'.format(series.get(index, 0) / 100) for index in range(len(buckets))]
+                for category, series in sorted(categories.items())
+            }
+
+        return summary
+
+    def get_user_transactions(self, user_email: str, date_from: datetime.date, date_to: datetime.date):
+        """Return the transactions made by the user within the date window."""
+        transactions = Transaction.objects.filter(user_email=user_email)
+        if date_from:
+            transactions = transactions.filter(date__gte=date_from)
+        if date_to:
+            transactions = transactions.filter(date__lte=date_to)
+
+        return transactions
+
+    @action(detail=False, url_path='cache-stats')
+    def cache_stats(self, request):
+        """Show the number of hits, misses and invalidations of the summaries cache, and its hit rate."""
+        return Response(get_stats())
 
     @extend_schema(
         parameters=[
@@ -61,29 +451,82 @@ class TransactionViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         """
         Action to list transactions. Supports the group_by=type query param, returning the
-        total inflow and outflow per user.
+        total inflow and outflow per user, cached until any transaction changes.
 
         Returns
         ----------
         Reponse
-            - HTTP status code 501 for query params different than group_by=type
+            - HTTP status code 501 for query params different than group_by=type and the pagination ones
             - Total inflow and outflow per user for query param group_by=type
-            - The default list queryset when no query params are informed
+            - A page of transactions ordered by date and reference when no other query params are informed
         """
         group_by = request.query_params.get('group_by', None)
+        pagination_params = {self.paginator.cursor_query_param, self.paginator.page_size_query_param}
+        query_params = set(request.query_params) - pagination_params
 
-        if request.query_params and group_by != 'type':
+        if query_params and group_by != 'type':
             return Response(status=status.HTTP_501_NOT_IMPLEMENTED)
-        elif request.query_params and group_by == 'type':
-            grouped_by_type_serializer = self.group_by_type()
-            return Response(grouped_by_type_serializer.data)
+        elif query_params and group_by == 'type':
+            return self.cached_response(request, 'group_by_type', None, lambda: self.group_by_type().data)
         else:
             return super(TransactionViewSet, self).list(request, *args, **kwargs)
 
     def group_by_type(self):
-        """Return the serializer with the transactions total inflow and total outflows per user."""
-        summary = Transaction.objects.values('user_email').annotate(
-                total_inflow=Sum('amount', filter=Q(type='inflow')),
-                total_outflow=Sum('amount', filter=Q(type='outflow'))
-            )
-        return TransactionGroupedByTypeSerializer(summary, many=True)
+        """
+        Return the serializer with the transactions total inflow and total outflows per user,
+        from the rollup table.
+        """
+        summary = TransactionRollup.objects.values('user_email').annotate(
+                total_inflow=Sum('total_amount', filter=Q(type='inflow')),
+                total_outflow=Sum('total_amount', filter=Q(type='outflow'))
+            ).order_by('user_email')
+        return time_serializer(self.request, TransactionGroupedByTypeSerializer(summary, many=True))
+
+
+class ImportJobViewSet(SerializationTimingMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                       mixins.ListModelMixin, viewsets.GenericViewSet):
+    """View for asynchronous transaction imports, processed by the `process_imports` worker."""
+    serializer_class = ImportJobSerializer
+    queryset = ImportJob.objects.defer('payload').order_by('-id')
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser, CSVParser]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='on_conflict',
+                description='Skip or update the transactions whose reference already exists',
+                required=False,
+                type=str,
+                enum=list(ON_CONFLICT_CHOICES)
+            ),
+            OpenApiParameter(name='on_error',
+                description='Fail the whole import on invalid transactions, or skip them and create the valid ones',
+                required=False,
+                type=str,
+                enum=list(ON_ERROR_CHOICES)
+            ),
+        ],
+    )
+    def create(self, request, *args, **kwargs):
+        """
+        Queue a list of transactions to be created in background.
+
+        Returns
+        ----------
+        Response
+            - HTTP status code 202 with the queued job, whose status can be followed on its detail URL
+            - HTTP status code 400 when the payload is not a list of transactions
+        """
+        payload = list(request.data) if isinstance(request.data, Iterator) else request.data
+        if not isinstance(payload, list):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Expected a list of transactions.']})
+
+        job = ImportJob.objects.create(
+            payload=payload,
+            total_rows=len(payload),
+            on_conflict=get_choice_query_param(request, 'on_conflict', ON_CONFLICT_CHOICES),
+            on_error=get_choice_query_param(request, 'on_error', ON_ERROR_CHOICES, default='abort'),
+        )
+        serializer = self.get_serializer(job)
+        headers = {'Location': reverse('transaction:import-detail', kwargs={'pk': job.pk})}
+
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED, headers=headers)